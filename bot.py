@@ -1,6 +1,8 @@
 import discord
 from discord.ext import commands
+import asyncio
 import os
+import sys
 import traceback
 from dotenv import load_dotenv
 from core.database import Database
@@ -8,39 +10,77 @@ from core.logger import logger
 
 # Load configuration
 load_dotenv()
+
+# Imported after load_dotenv() since utils.health reads its webhook URL at import
+try:
+    from utils.health import send_health_alert
+except ImportError:
+    send_health_alert = None
+
 DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
 POSTGRES_DSN = os.getenv("POSTGRES_DSN")
+# Set when POSTGRES_DSN points at a PgBouncer transaction-mode pooler
+POSTGRES_PGBOUNCER = os.getenv("POSTGRES_PGBOUNCER", "").lower() in ("1", "true", "yes")
+POSTGRES_LISTEN_DSN = os.getenv("POSTGRES_LISTEN_DSN")
+
+HEALTH_ALERT_TB_FRAMES = 8
 
 if not DISCORD_TOKEN or not POSTGRES_DSN:
     logger.critical("Error: DISCORD_TOKEN or POSTGRES_DSN not found in environment variables.")
 
 # Env-based blocklist seeds
-ENV_BLOCKED_USERS = [
-    int(x.strip()) for x in os.getenv("BLOCKED_USERS", "").split(",") if x.strip()
-]
-ENV_BLOCKED_GUILDS = [
-    int(x.strip()) for x in os.getenv("BLOCKED_GUILDS", "").split(",") if x.strip()
-]
+def parse_id_list(name: str) -> frozenset:
+    """Comma-separated IDs from an env var, e.g. BLOCKED_USERS=1,2,3."""
+    return frozenset(int(t) for t in map(str.strip, os.getenv(name, "").split(",")) if t)
+
+
+ENV_BLOCKED_USERS = parse_id_list("BLOCKED_USERS")
+ENV_BLOCKED_GUILDS = parse_id_list("BLOCKED_GUILDS")
+
+BLOCKED_USER_RESPONSE = {"content": "You are blocked from using this bot.", "ephemeral": True}
+BLOCKED_GUILD_RESPONSE = {"content": "This server is blocked from using this bot.", "ephemeral": True}
+
+
+def install_uvloop():
+    """Use uvloop's libuv event loop when available (not supported on Windows)."""
+    if sys.platform == "win32":
+        return
+    try:
+        import uvloop
+    except ImportError:
+        logger.info("uvloop not installed, using the default asyncio event loop.")
+        return
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    logger.info("Using uvloop event loop.")
 
 
 class BF1942Bot(commands.Bot):
     def __init__(self):
-        intents = discord.Intents.default()
-        intents.presences = True
-        intents.members = True
-        intents.messages = True
+        # Slash commands, channel lookups and DMs only need guild events; no
+        # cog reads members, presences or message content, so don't stream them.
+        intents = discord.Intents.none()
+        intents.guilds = True
 
         super().__init__(
             intents=intents,
+            member_cache_flags=discord.MemberCacheFlags.none(),
+            chunk_guilds_at_startup=False,
             allowed_mentions=discord.AllowedMentions.none(),
+            # Synced once per process in on_ready instead of on every connect
+            auto_sync_commands=False,
         )
 
         # Initialize Database
-        self.db = Database(POSTGRES_DSN)
+        self.db = Database(POSTGRES_DSN, pgbouncer=POSTGRES_PGBOUNCER, listen_dsn=POSTGRES_LISTEN_DSN)
 
-        # Blocklist — populated on_ready after DB connect
-        self.blocked_user_ids: set = set()
-        self.blocked_guild_ids: set = set()
+        # Blocklist — populated on_ready after DB connect. Frozen so the
+        # per-command check is a hash lookup and never sees a partial update.
+        self.blocked_user_ids: frozenset = ENV_BLOCKED_USERS
+        self.blocked_guild_ids: frozenset = ENV_BLOCKED_GUILDS
+
+        # on_ready fires again after gateway reconnects; the command tree
+        # can't change within a process, so it is only pushed once.
+        self.commands_synced = False
 
         # Load Cogs
         self.load_extensions()
@@ -56,89 +96,137 @@ class BF1942Bot(commands.Bot):
             "cogs.profile",
             "cogs.digest",
         ]
+        loaded = []
         for ext in extensions:
             try:
                 self.load_extension(ext)
-                logger.info(f"Loaded extension: {ext}")
+                loaded.append(ext)
             except Exception as e:
                 logger.error(f"Failed to load extension {ext}: {e}")
+        logger.info(f"Loaded {len(loaded)}/{len(extensions)} extensions: {', '.join(loaded)}")
 
-    async def on_ready(self):
-        logger.info(f"Logged in as {self.user} (ID: {self.user.id})")
-
-        # Connect to Database if not already connected
-        if not self.db.pool:
-            try:
-                await self.db.connect()
-            except Exception as e:
-                logger.critical(f"Failed to connect to database on startup: {e}")
-                return
-
-        # Run startup migrations
+    async def setup_database(self):
+        """Connect, migrate and warm the database; run before the gateway connects."""
         try:
-            await self.db.run_migrations()
+            await self.db.connect()
         except Exception as e:
-            logger.error(f"Migration error: {e}")
+            logger.critical(f"Failed to connect to database on startup: {e}")
+            return
+
+        # Run startup migrations while ClickHouse connects (sync client, so it
+        # runs in a worker thread; no-op if not configured)
+        migrations, _ = await asyncio.gather(
+            self.db.run_migrations(),
+            asyncio.to_thread(self.db.connect_clickhouse),
+            return_exceptions=True,
+        )
+        if isinstance(migrations, Exception):
+            logger.error(f"Migration error: {migrations}")
 
-        # Connect ClickHouse (sync, no-op if not configured)
-        self.db.connect_clickhouse()
+        try:
+            await self.db.warm_pool()
+        except Exception as e:
+            logger.warning(f"Pool warm-up failed: {e}")
 
         # Load blocklist from DB + env
         try:
             db_blocklist = await self.db.get_blocklist()
-            self.blocked_user_ids = set(db_blocklist['users'] + ENV_BLOCKED_USERS)
-            self.blocked_guild_ids = set(db_blocklist['guilds'] + ENV_BLOCKED_GUILDS)
+            self.blocked_user_ids = ENV_BLOCKED_USERS.union(db_blocklist['users'])
+            self.blocked_guild_ids = ENV_BLOCKED_GUILDS.union(db_blocklist['guilds'])
             logger.info(f"Blocklist loaded: {len(self.blocked_user_ids)} users, {len(self.blocked_guild_ids)} guilds")
         except Exception as e:
             logger.error(f"Failed to load blocklist: {e}")
-            self.blocked_user_ids = set(ENV_BLOCKED_USERS)
-            self.blocked_guild_ids = set(ENV_BLOCKED_GUILDS)
+            self.blocked_user_ids = ENV_BLOCKED_USERS
+            self.blocked_guild_ids = ENV_BLOCKED_GUILDS
+
+    async def on_ready(self):
+        logger.info(f"Logged in as {self.user} (ID: {self.user.id})")
 
-        await self.sync_commands()
-        logger.info("Slash commands synced.")
+        # Retry if the database was unreachable when the process started
+        if not self.db.pool:
+            await self.setup_database()
+
+        if not self.commands_synced:
+            await self.sync_commands()
+            self.commands_synced = True
+            logger.info("Slash commands synced.")
 
     async def on_application_command_error(self, ctx, error):
         """Global error handler — logs and sends health webhook."""
         logger.error(f"Command error in /{ctx.command}: {error}")
-        try:
-            from utils.health import send_health_alert
-            tb = "".join(traceback.format_exception(type(error), error, error.__traceback__))
-            await send_health_alert(
-                f"Command Error: /{ctx.command}",
-                f"Guild: {ctx.guild}\nUser: {ctx.author}\n```\n{tb[:1500]}\n```"
+        if send_health_alert is None:
+            return
+
+        def describe():
+            # Only the innermost frames fit in the alert, so don't format the rest
+            tb = "".join(
+                traceback.format_tb(error.__traceback__, limit=-HEALTH_ALERT_TB_FRAMES)
+                + traceback.format_exception_only(type(error), error)
             )
+            return f"Guild: {ctx.guild}\nUser: {ctx.author}\n```\n{tb[:1500]}\n```"
+
+        try:
+            await send_health_alert(f"Command Error: /{ctx.command}", describe)
         except Exception:
             pass
 
     async def close(self):
         """Cleanup on bot shutdown."""
         logger.info("Bot is shutting down...")
-        if self.db:
-            await self.db.close()
-        await super().close()
+        try:
+            subscriptions = self.get_cog("SubscriptionCommands")
+            if subscriptions:
+                await subscriptions.close_webhook_session()
+        except Exception as e:
+            logger.error(f"Error closing webhook session: {e}")
+        try:
+            if self.db and self.db.pool:
+                await self.db.close()
+        except Exception as e:
+            logger.error(f"Error closing database: {e}")
+        finally:
+            await super().close()
 
 
-if __name__ == "__main__":
-    try:
-        if not DISCORD_TOKEN:
-            raise ValueError("No token found")
+async def main():
+    bot = BF1942Bot()
 
-        bot = BF1942Bot()
+    # --- GLOBAL RESTRICTIONS (Users & Servers) ---
+    @bot.check
+    async def global_restrictions(ctx):
+        # Common case: nothing is blocked
+        if not bot.blocked_user_ids and not bot.blocked_guild_ids:
+            return True
 
-        # --- GLOBAL RESTRICTIONS (Users & Servers) ---
-        @bot.check
-        async def global_restrictions(ctx):
-            if ctx.author.id in bot.blocked_user_ids:
-                await ctx.respond("You are blocked from using this bot.", ephemeral=True)
-                return False
+        if ctx.author.id in bot.blocked_user_ids:
+            await ctx.respond(**BLOCKED_USER_RESPONSE)
+            return False
 
-            if ctx.guild and ctx.guild.id in bot.blocked_guild_ids:
-                await ctx.respond("This server is blocked from using this bot.", ephemeral=True)
-                return False
+        if ctx.guild and ctx.guild.id in bot.blocked_guild_ids:
+            await ctx.respond(**BLOCKED_GUILD_RESPONSE)
+            return False
 
-            return True
-        # ---------------------------------------------
+        return True
+    # ---------------------------------------------
+
+    try:
+        # Pool, migrations and blocklist are ready before the first command arrives
+        await bot.setup_database()
+        await bot.start(DISCORD_TOKEN)
+    finally:
+        if not bot.is_closed():
+            await bot.close()
+
+
+if __name__ == "__main__":
+    try:
+        if not DISCORD_TOKEN:
+            raise ValueError("No token found")
 
-        bot.run(DISCORD_TOKEN)
+        # Must run before asyncio.run() so the loop comes from uvloop
+        install_uvloop()
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
     except Exception as e:
         logger.critical(f"Failed to run bot: {e}")
@@ -5,7 +5,9 @@ import logging
 import datetime
 import pytz
 from core.database import Database
+from utils.errors import handle_errors
 from utils.dnd import is_in_dnd
+from utils.users import resolve_user
 
 logger = logging.getLogger("bf1942_bot")
 
@@ -23,6 +25,7 @@ class DigestCommands(commands.Cog):
         return self.bot.db
 
     @commands.slash_command(name="digest_subscribe", description="Get a daily summary of BF1942 activity.")
+    @handle_errors()
     async def digest_subscribe(
         self,
         ctx: discord.ApplicationContext,
@@ -39,29 +42,22 @@ class DigestCommands(commands.Cog):
                 )
                 return
 
-        try:
-            await self.db.upsert_digest_subscription(ctx.author.id, ctx.guild.id, channel_id)
-            destination = f"channel **{channel.name}**" if channel else "your **DMs**"
-            await ctx.respond(
-                f"You are now subscribed to the **daily digest**.\n"
-                f"It will be sent to {destination} around midnight UTC.",
-                ephemeral=True
-            )
-        except Exception as e:
-            logger.error(f"Error in /digest_subscribe: {e}")
-            await ctx.respond("Something went wrong.", ephemeral=True)
+        await self.db.upsert_digest_subscription(ctx.author.id, ctx.guild.id, channel_id)
+        destination = f"channel **{channel.name}**" if channel else "your **DMs**"
+        await ctx.respond(
+            f"You are now subscribed to the **daily digest**.\n"
+            f"It will be sent to {destination} around midnight UTC.",
+            ephemeral=True
+        )
 
     @commands.slash_command(name="digest_unsubscribe", description="Stop receiving daily digests.")
+    @handle_errors()
     async def digest_unsubscribe(self, ctx: discord.ApplicationContext):
-        try:
-            count = await self.db.delete_digest_subscription(ctx.author.id)
-            if count > 0:
-                await ctx.respond("Unsubscribed from the daily digest.", ephemeral=True)
-            else:
-                await ctx.respond("You weren't subscribed to the daily digest.", ephemeral=True)
-        except Exception as e:
-            logger.error(f"Error in /digest_unsubscribe: {e}")
-            await ctx.respond("Something went wrong.", ephemeral=True)
+        count = await self.db.delete_digest_subscription(ctx.author.id)
+        if count > 0:
+            await ctx.respond("Unsubscribed from the daily digest.", ephemeral=True)
+        else:
+            await ctx.respond("You weren't subscribed to the daily digest.", ephemeral=True)
 
     @tasks.loop(minutes=5)
     async def daily_digest(self):
@@ -135,7 +131,7 @@ class DigestCommands(commands.Cog):
                         logger.error(f"Error sending digest to channel {channel_id}: {e}")
                 else:
                     try:
-                        user = await self.bot.fetch_user(user_id)
+                        user = await resolve_user(self.bot, user_id)
                         await user.send(content=clean_content, embed=embed)
                     except discord.Forbidden:
                         logger.warning(f"Cannot DM user {user_id}")
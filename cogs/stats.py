@@ -3,9 +3,18 @@ from discord.ext import commands
 from discord.commands import Option
 import logging
 from core.database import Database
+from utils.errors import handle_errors
 
 logger = logging.getLogger("bf1942_bot")
 
+SUB_STAT_LINE = "{}. **{}** ({} subs)".format
+
+
+def format_sub_stats(rows, empty: str) -> str:
+    """Numbered "name (N subs)" lines for an /alert_stats field."""
+    return "\n".join(SUB_STAT_LINE(i, row['name'], row['count']) for i, row in enumerate(rows, 1)) or empty
+
+
 class StatCommands(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
@@ -15,85 +24,72 @@ class StatCommands(commands.Cog):
         return self.bot.db
 
     @commands.slash_command(name="alert_stats", description="See which maps and servers are most popular.")
+    @handle_errors("Something went wrong, I couldn't fetch the stats.")
     async def alert_stats(self, ctx: discord.ApplicationContext):
         await ctx.defer(ephemeral=False)
-        try:
-            map_rows = await self.db.get_top_map_subs()
-            server_rows = await self.db.get_top_server_subs()
-
-            embed = discord.Embed(title="Bot Alert Statistics", color=discord.Color.dark_purple())
-
-            map_desc = ""
-            if not map_rows:
-                map_desc = "No map subscriptions found."
-            else:
-                for i, row in enumerate(map_rows):
-                    map_desc += f"{i+1}. **{row['map_name']}** ({row['count']} subs)\n"
-            embed.add_field(name="Top 10 Subscribed Maps", value=map_desc, inline=False)
-
-            server_desc = ""
-            if not server_rows:
-                server_desc = "No server subscriptions found."
-            else:
-                for i, row in enumerate(server_rows):
-                    server_desc += f"{i+1}. **{row['server_name']}** ({row['count']} subs)\n"
-            embed.add_field(name="Top 10 Subscribed Servers", value=server_desc, inline=False)
+        sub_stats = await self.db.get_top_subscription_stats()
+        map_rows = sub_stats['maps']
+        server_rows = sub_stats['servers']
 
-            await ctx.followup.send(embed=embed)
-        except Exception as e:
-            logger.error(f"Error in /alert_stats: {e}")
-            await ctx.followup.send("Something went wrong, I couldn't fetch the stats.", ephemeral=True)
+        embed = discord.Embed(title="Bot Alert Statistics", color=discord.Color.dark_purple())
+
+        embed.add_field(
+            name="Top 10 Subscribed Maps",
+            value=format_sub_stats(map_rows, "No map subscriptions found."),
+            inline=False
+        )
+        embed.add_field(
+            name="Top 10 Subscribed Servers",
+            value=format_sub_stats(server_rows, "No server subscriptions found."),
+            inline=False
+        )
+
+        await ctx.followup.send(embed=embed)
 
     @commands.slash_command(name="find", description="Find which server a specific player is on.")
+    @handle_errors("Something went wrong, I couldn't perform the player search.")
     async def find(
         self,
         ctx: discord.ApplicationContext,
         player_name: Option(str, "Enter the full, case-sensitive player name")
     ):
         await ctx.defer(ephemeral=True)
-        try:
-            found_player = await self.db.find_player(player_name)
-
-            if found_player:
-                embed = discord.Embed(
-                    title=f"Player Found: {player_name}",
-                    color=discord.Color.blue()
-                )
-                embed.add_field(name="Server", value=found_player['current_server_name'], inline=False)
-                embed.add_field(name="Score", value=str(found_player['score'] or 0), inline=True)
-                embed.add_field(name="Kills", value=str(found_player['kills'] or 0), inline=True)
-                embed.add_field(name="Deaths", value=str(found_player['deaths'] or 0), inline=True)
-                await ctx.followup.send(embed=embed)
-            else:
-                await ctx.followup.send(f"Could not find a player named **{player_name}** on any active server.")
-        except Exception as e:
-            logger.error(f"Error in /find: {e}")
-            await ctx.followup.send("Something went wrong, I couldn't perform the player search.", ephemeral=True)
+        found_player = await self.db.find_player(player_name)
+
+        if found_player:
+            embed = discord.Embed(
+                title=f"Player Found: {player_name}",
+                color=discord.Color.blue()
+            )
+            embed.add_field(name="Server", value=found_player['current_server_name'], inline=False)
+            embed.add_field(name="Score", value=str(found_player['score'] or 0), inline=True)
+            embed.add_field(name="Kills", value=str(found_player['kills'] or 0), inline=True)
+            embed.add_field(name="Deaths", value=str(found_player['deaths'] or 0), inline=True)
+            await ctx.followup.send(embed=embed)
+        else:
+            await ctx.followup.send(f"Could not find a player named **{player_name}** on any active server.")
 
     @commands.slash_command(name="stats", description="See global BF1942 statistics.")
+    @handle_errors()
     async def stats(self, ctx: discord.ApplicationContext):
         await ctx.defer(ephemeral=False)
-        try:
-            global_stats = await self.db.get_global_stats()
-            active_count = await self.db.get_active_player_count()
-            popular_maps = await self.db.get_popular_maps_last_7_days()
+        global_stats = await self.db.get_global_stats()
+        active_count = await self.db.get_active_player_count()
+        popular_maps = await self.db.get_popular_maps_last_7_days()
 
-            embed = discord.Embed(title="BF1942 Global Stats", color=discord.Color.dark_teal())
+        embed = discord.Embed(title="BF1942 Global Stats", color=discord.Color.dark_teal())
 
-            total_rounds = global_stats['total_rounds'] if global_stats else 0
-            unique_players = global_stats['unique_players'] if global_stats else 0
-            embed.add_field(name="Total Rounds", value=f"{total_rounds:,}", inline=True)
-            embed.add_field(name="Unique Players", value=f"{unique_players:,}", inline=True)
-            embed.add_field(name="Currently Active", value=str(active_count), inline=True)
+        total_rounds = global_stats['total_rounds'] if global_stats else 0
+        unique_players = global_stats['unique_players'] if global_stats else 0
+        embed.add_field(name="Total Rounds", value=f"{total_rounds:,}", inline=True)
+        embed.add_field(name="Unique Players", value=f"{unique_players:,}", inline=True)
+        embed.add_field(name="Currently Active", value=str(active_count), inline=True)
 
-            if popular_maps:
-                map_lines = [f"**{m['map_name']}** — {m['play_count']} rounds" for m in popular_maps]
-                embed.add_field(name="Popular Maps (Last 7 Days)", value="\n".join(map_lines), inline=False)
+        if popular_maps:
+            map_lines = [f"**{m['map_name']}** — {m['play_count']} rounds" for m in popular_maps]
+            embed.add_field(name="Popular Maps (Last 7 Days)", value="\n".join(map_lines), inline=False)
 
-            await ctx.followup.send(embed=embed)
-        except Exception as e:
-            logger.error(f"Error in /stats: {e}")
-            await ctx.followup.send("Something went wrong.", ephemeral=True)
+        await ctx.followup.send(embed=embed)
 
 def setup(bot):
     bot.add_cog(StatCommands(bot))
@@ -5,12 +5,44 @@ import logging
 import pytz
 import datetime
 import asyncio
+import random
+import aiohttp
+from collections import defaultdict
+from itertools import islice
+from typing import Dict, Optional
 from core.database import Database
+from utils.errors import handle_errors
+from utils.autocomplete import cached_suggestions
+from utils.alerts import AlertMessage
 from utils.dnd import is_in_dnd
+from utils.users import resolve_user
 
 logger = logging.getLogger("bf1942_bot")
 
 SERVER_SUB_MAP_NAME = "*all*"
+ALERT_CONCURRENCY = 20
+ALERT_WEBHOOK_NAME = "BF1942 Map Alerts"
+WEBHOOK_HEADERS = {"Content-Type": "application/json"}
+# _post_webhook outcomes
+WEBHOOK_SENT = "sent"
+WEBHOOK_GONE = "gone"
+WEBHOOK_RATE_LIMITED = "rate_limited"
+WEBHOOK_FAILED = "failed"
+WEBHOOK_DEFAULT_RETRY_AFTER = 1.0
+WEBHOOK_MAX_RETRY_AFTER = 5.0
+
+# Postgres NOTIFY channel the stats engine signals on when a server changes map.
+# Polling stays on as a fallback and slows down once notifications are seen.
+MAP_CHANGE_CHANNEL = "map_change"
+MAP_CHECK_INTERVAL_SECONDS = 45
+MAP_CHANGE_FALLBACK_MINUTES = 5
+# Backoff between attempts to re-establish a dropped LISTEN connection
+LISTEN_RETRY_MIN_SECONDS = 5
+LISTEN_RETRY_MAX_SECONDS = 300
+# Random delay before each polling tick so several bot instances don't query in lockstep
+MAP_CHECK_JITTER_SECONDS = 5
+# Checks a detected change is retried for before its alerts are given up on
+MAP_ALERT_MAX_ATTEMPTS = 3
 
 # Helper Constants for DND
 DAY_MAP = {
@@ -18,38 +50,68 @@ DAY_MAP = {
 }
 DAY_NAMES = [ "Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun" ]
 
+# Timezone autocomplete: (lowercase name, name) pairs built once at import
+COMMON_TIMEZONES = [
+    (tz.lower(), tz) for tz in (
+        "UTC", "US/Eastern", "US/Central", "US/Mountain", "US/Pacific",
+        "Europe/London", "Europe/Berlin", "Europe/Moscow",
+        "Australia/Sydney"
+    )
+]
+ALL_TIMEZONES = [(tz.lower(), tz) for tz in pytz.all_timezones]
+
 async def search_servers(ctx: discord.AutocompleteContext):
     db: Database = ctx.bot.db
-    return await db.get_server_suggestions(ctx.value)
+    return await cached_suggestions("servers", ctx.value, lambda: db.get_server_suggestions(ctx.value))
 
 async def search_maps(ctx: discord.AutocompleteContext):
     db: Database = ctx.bot.db
-    return await db.get_map_suggestions(ctx.value)
+    return await cached_suggestions("maps", ctx.value, lambda: db.get_map_suggestions(ctx.value))
 
 async def search_timezones(ctx: discord.AutocompleteContext):
     """Provides suggestions for timezones."""
     value = ctx.value.lower().replace(" ", "_")
-    common_zones = [
-        "UTC", "US/Eastern", "US/Central", "US/Mountain", "US/Pacific",
-        "Europe/London", "Europe/Berlin", "Europe/Moscow",
-        "Australia/Sydney"
-    ]
-    if len(value) < 2:
-        return [tz for tz in common_zones if value in tz.lower()][:25]
-
-    all_matches = [tz for tz in pytz.all_timezones if value in tz.lower()][:25]
-    return all_matches
+    zones = COMMON_TIMEZONES if len(value) < 2 else ALL_TIMEZONES
+    return list(islice((tz for tz_lc, tz in zones if value in tz_lc), 25))
 
 class SubscriptionCommands(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.last_known_maps = {}
+        # Caps in-flight Discord sends so a large fan-out stays under rate limits
+        self.alert_semaphore = asyncio.Semaphore(ALERT_CONCURRENCY)
+        # Serializes map checks between the polling loop and NOTIFY wake-ups
+        self.map_check_lock = asyncio.Lock()
+        self.map_check_pending = False
+        self.map_change_notified = False
+        # server_name -> [change row, attempts] for changes whose alerts haven't been
+        # dispatched yet. detect_map_changes() records the new map immediately, so a
+        # failure before dispatch is retried from here on the next check.
+        self.pending_map_changes: Dict[str, list] = {}
+        # Strong references to fire-and-forget tasks so they aren't collected mid-run
+        self.background_tasks = set()
+        # channel_id -> webhook URL used for alert posts (own rate-limit bucket per webhook)
+        self.alert_webhooks: Dict[int, str] = {}
+        # Channels where webhook setup failed (e.g. webhook limit reached); not retried this process
+        self.webhook_setup_failed = set()
+        self.webhook_session: Optional[aiohttp.ClientSession] = None
         self.check_map_changes.start()
         self.check_round_results.start()
 
     def cog_unload(self):
         self.check_map_changes.cancel()
         self.check_round_results.cancel()
+        for task in self.background_tasks:
+            task.cancel()
+        self.bot.loop.create_task(self.db.unlisten(MAP_CHANGE_CHANNEL, self._on_map_change_notify))
+        # Shutdown awaits close_webhook_session() from BF1942Bot.close(); this only covers a reload
+        if self.webhook_session:
+            self._spawn(self.close_webhook_session())
+
+    async def close_webhook_session(self):
+        """Closes the aiohttp session used for alert webhooks, if one is open."""
+        session, self.webhook_session = self.webhook_session, None
+        if session and not session.closed:
+            await session.close()
 
     @property
     def db(self) -> Database:
@@ -58,6 +120,7 @@ class SubscriptionCommands(commands.Cog):
     dnd = SlashCommandGroup("dnd", "Manage your Do Not Disturb (DND) schedule.")
 
     @commands.slash_command(name="subscribe", description="Get an alert when a map starts on a server.")
+    @handle_errors("Something went wrong, I couldn't save your subscription.")
     async def subscribe(
         self,
         ctx: discord.ApplicationContext,
@@ -78,21 +141,18 @@ class SubscriptionCommands(commands.Cog):
                 )
                 return
 
-        try:
-            await self.db.upsert_subscription(
-                ctx.author.id, server, map_name.lower(), players_over, ctx.guild.id, channel_id
-            )
-            destination = f"channel **{channel.name}**" if channel else "your **DMs**"
-            await ctx.respond(
-                f"You are now subscribed to **{map_name}** on **{server}**.\n"
-                f"Alerts will be sent to {destination}.",
-                ephemeral=True
-            )
-        except Exception as e:
-            logger.error(f"Error in /subscribe: {e}")
-            await ctx.respond("Something went wrong, I couldn't save your subscription.", ephemeral=True)
+        await self.db.upsert_subscription(
+            ctx.author.id, server, map_name, players_over, ctx.guild.id, channel_id
+        )
+        destination = f"channel **{channel.name}**" if channel else "your **DMs**"
+        await ctx.respond(
+            f"You are now subscribed to **{map_name}** on **{server}**.\n"
+            f"Alerts will be sent to {destination}.",
+            ephemeral=True
+        )
 
     @commands.slash_command(name="subscribe_server", description="Get an alert for *every* map change on a server.")
+    @handle_errors("Something went wrong, I couldn't save your subscription.")
     async def subscribe_server(
         self,
         ctx: discord.ApplicationContext,
@@ -111,21 +171,18 @@ class SubscriptionCommands(commands.Cog):
                 )
                 return
 
-        try:
-            await self.db.upsert_subscription(
-                ctx.author.id, server, SERVER_SUB_MAP_NAME, players_over, ctx.guild.id, channel_id
-            )
-            destination = f"channel **{channel.name}**" if channel else "your **DMs**"
-            await ctx.respond(
-                f"You are now subscribed to **all map changes** on **{server}**.\n"
-                f"Alerts will be sent to {destination}.",
-                ephemeral=True
-            )
-        except Exception as e:
-            logger.error(f"Error in /subscribe_server: {e}")
-            await ctx.respond("Something went wrong, I couldn't save your subscription.", ephemeral=True)
+        await self.db.upsert_subscription(
+            ctx.author.id, server, SERVER_SUB_MAP_NAME, players_over, ctx.guild.id, channel_id
+        )
+        destination = f"channel **{channel.name}**" if channel else "your **DMs**"
+        await ctx.respond(
+            f"You are now subscribed to **all map changes** on **{server}**.\n"
+            f"Alerts will be sent to {destination}.",
+            ephemeral=True
+        )
 
     @commands.slash_command(name="subscribe_rounds", description="Get notified when a round ends on a server.")
+    @handle_errors()
     async def subscribe_rounds(
         self,
         ctx: discord.ApplicationContext,
@@ -143,102 +200,92 @@ class SubscriptionCommands(commands.Cog):
                 )
                 return
 
-        try:
-            await self.db.upsert_round_result_subscription(
-                ctx.author.id, server, ctx.guild.id, channel_id
-            )
-            destination = f"channel **{channel.name}**" if channel else "your **DMs**"
-            await ctx.respond(
-                f"You are now subscribed to **round results** on **{server}**.\n"
-                f"Alerts will be sent to {destination}.",
-                ephemeral=True
-            )
-        except Exception as e:
-            logger.error(f"Error in /subscribe_rounds: {e}")
-            await ctx.respond("Something went wrong.", ephemeral=True)
+        await self.db.upsert_round_result_subscription(
+            ctx.author.id, server, ctx.guild.id, channel_id
+        )
+        destination = f"channel **{channel.name}**" if channel else "your **DMs**"
+        await ctx.respond(
+            f"You are now subscribed to **round results** on **{server}**.\n"
+            f"Alerts will be sent to {destination}.",
+            ephemeral=True
+        )
 
     @commands.slash_command(name="unsubscribe_rounds", description="Stop round result notifications for a server.")
+    @handle_errors()
     async def unsubscribe_rounds(
         self,
         ctx: discord.ApplicationContext,
         server: Option(str, "Start typing the server name", autocomplete=search_servers)
     ):
-        try:
-            count = await self.db.delete_round_result_subscription(ctx.author.id, server)
-            if count > 0:
-                await ctx.respond(f"Unsubscribed from round results on **{server}**.", ephemeral=True)
-            else:
-                await ctx.respond(f"You weren't subscribed to round results on **{server}**.", ephemeral=True)
-        except Exception as e:
-            logger.error(f"Error in /unsubscribe_rounds: {e}")
-            await ctx.respond("Something went wrong.", ephemeral=True)
+        count = await self.db.delete_round_result_subscription(ctx.author.id, server)
+        if count > 0:
+            await ctx.respond(f"Unsubscribed from round results on **{server}**.", ephemeral=True)
+        else:
+            await ctx.respond(f"You weren't subscribed to round results on **{server}**.", ephemeral=True)
 
     @commands.slash_command(name="list", description="See all of your current map alerts.")
+    @handle_errors("Something went wrong, I couldn't fetch your subscriptions.")
     async def list_subscriptions(self, ctx: discord.ApplicationContext):
-        try:
-            user_subs = await self.db.get_user_subscriptions(ctx.author.id)
-            if not user_subs:
-                await ctx.respond("You have no active subscriptions.", ephemeral=True)
-                return
-
-            embed = discord.Embed(title="Your Map Alert Subscriptions", color=discord.Color.blue())
-            description = ""
-            for sub in user_subs:
-                player_condition = f" (Players > {sub['players_over']})" if sub.get('players_over', 0) > 0 else ""
-
-                destination = "-> DMs"
-                if sub['channel_id']:
-                    channel = self.bot.get_channel(sub['channel_id'])
-                    channel_name = f"#{channel.name}" if channel else f"Unknown Channel ({sub['channel_id']})"
-                    destination = f"-> {channel_name}"
+        user_subs = await self.db.get_user_subscriptions(ctx.author.id)
+        if not user_subs:
+            await ctx.respond("You have no active subscriptions.", ephemeral=True)
+            return
 
-                map_name = sub['map_name']
-                if map_name == SERVER_SUB_MAP_NAME:
-                    map_display = "**Any Map**"
-                else:
-                    map_display = f"**{map_name}**"
+        embed = discord.Embed(title="Your Map Alert Subscriptions", color=discord.Color.blue())
+        channels = {
+            channel_id: self.bot.get_channel(channel_id)
+            for channel_id in {sub['channel_id'] for sub in user_subs if sub['channel_id']}
+        }
+        lines = []
+        for sub in user_subs:
+            player_condition = f" (Players > {sub['players_over']})" if sub.get('players_over', 0) > 0 else ""
+
+            destination = "-> DMs"
+            if sub['channel_id']:
+                channel = channels[sub['channel_id']]
+                channel_name = f"#{channel.name}" if channel else f"Unknown Channel ({sub['channel_id']})"
+                destination = f"-> {channel_name}"
+
+            map_name = sub['map_name']
+            if map_name == SERVER_SUB_MAP_NAME:
+                map_display = "**Any Map**"
+            else:
+                map_display = f"**{map_name}**"
 
-                paused_status = " (PAUSED)" if sub['is_paused'] else ""
+            paused_status = " (PAUSED)" if sub['is_paused'] else ""
 
-                description += f"**{sub['server_name']}** -> {map_display}{player_condition} {destination}{paused_status}\n"
+            lines.append(f"**{sub['server_name']}** -> {map_display}{player_condition} {destination}{paused_status}")
 
-            embed.description = description
-            await ctx.respond(embed=embed, ephemeral=True)
-        except Exception as e:
-            logger.error(f"Error in /list: {e}")
-            await ctx.respond("Something went wrong, I couldn't fetch your subscriptions.", ephemeral=True)
+        embed.description = "\n".join(lines)
+        await ctx.respond(embed=embed, ephemeral=True)
 
     @commands.slash_command(name="unsubscribe", description="Removes all of your active map alerts.")
+    @handle_errors("Something went wrong, I couldn't remove your subscriptions.")
     async def unsubscribe(self, ctx: discord.ApplicationContext):
-        try:
-            deleted_count = await self.db.delete_all_subscriptions(ctx.author.id)
-            await ctx.respond(f"All {deleted_count} of your subscriptions have been removed.", ephemeral=True)
-        except Exception as e:
-            logger.error(f"Error in /unsubscribe: {e}")
-            await ctx.respond("Something went wrong, I couldn't remove your subscriptions.", ephemeral=True)
+        deleted_count = await self.db.delete_all_subscriptions(ctx.author.id)
+        await ctx.respond(f"All {deleted_count} of your subscriptions have been removed.", ephemeral=True)
 
     @commands.slash_command(name="pause_alerts", description="Temporarily pause or unpause all of your map alerts.")
+    @handle_errors("Something went wrong, I couldn't update your subscriptions.")
     async def pause_alerts(
         self,
         ctx: discord.ApplicationContext,
         status: Option(str, "Pause or unpause your alerts", choices=["pause", "unpause"])
     ):
         is_paused_bool = True if status == "pause" else False
-        try:
-            count = await self.db.set_subscription_paused(ctx.author.id, is_paused_bool)
+        count = await self.db.set_subscription_paused(ctx.author.id, is_paused_bool)
 
-            if count == 0:
-                await ctx.respond("You have no subscriptions to update.", ephemeral=True)
-                return
+        if count == 0:
+            state_text = "active" if is_paused_bool else "paused"
+            await ctx.respond(f"You have no {state_text} subscriptions to update.", ephemeral=True)
+            return
 
-            action_text = "paused" if is_paused_bool else "unpaused"
-            await ctx.respond(f"All {count} of your subscriptions have been **{action_text}**.", ephemeral=True)
-        except Exception as e:
-            logger.error(f"Error in /pause_alerts: {e}")
-            await ctx.respond("Something went wrong, I couldn't update your subscriptions.", ephemeral=True)
+        action_text = "paused" if is_paused_bool else "unpaused"
+        await ctx.respond(f"{count} of your subscriptions have been **{action_text}**.", ephemeral=True)
 
     # --- DND COMMANDS ---
     @dnd.command(name="set", description="Set a DND schedule to block alerts.")
+    @handle_errors("Something went wrong, I couldn't save your DND schedule.")
     async def dnd_set(
         self,
         ctx: discord.ApplicationContext,
@@ -285,165 +332,318 @@ class SubscriptionCommands(commands.Cog):
         start_utc = start_local.astimezone(pytz.utc)
         end_utc = end_local.astimezone(pytz.utc)
 
-        utc_days = set()
-        for day_offset in range(8):
-            test_date = start_local + datetime.timedelta(days=day_offset)
-            if test_date.weekday() in day_list:
-                utc_days.add(test_date.astimezone(pytz.utc).weekday())
+        # The UTC conversion moves the start by at most a day either way;
+        # apply the same shift to every selected weekday.
+        day_shift = (start_utc.date() - start_local.date()).days
+        utc_days = sorted({(day + day_shift) % 7 for day in day_list})
 
-        try:
-            await self.db.upsert_dnd_rule(ctx.author.id, start_utc.hour, end_utc.hour, list(utc_days), timezone)
-            day_names_str = ", ".join([DAY_NAMES[i] for i in day_list])
-            await ctx.followup.send(f"DND schedule set!\n"
-                                    f"Alerts blocked from **{start_hour:02d}:00** to **{end_hour:02d}:00** ({timezone})\n"
-                                    f"On these days: **{day_names_str}**")
-        except Exception as e:
-            logger.error(f"Error in /dnd set: {e}")
-            await ctx.followup.send("Something went wrong, I couldn't save your DND schedule.")
+        await self.db.upsert_dnd_rule(ctx.author.id, start_utc.hour, end_utc.hour, utc_days, timezone)
+        day_names_str = ", ".join([DAY_NAMES[i] for i in day_list])
+        await ctx.followup.send(f"DND schedule set!\n"
+                                f"Alerts blocked from **{start_hour:02d}:00** to **{end_hour:02d}:00** ({timezone})\n"
+                                f"On these days: **{day_names_str}**")
 
     @dnd.command(name="view", description="Show your current DND schedule.")
+    @handle_errors()
     async def dnd_view(self, ctx: discord.ApplicationContext):
         await ctx.defer(ephemeral=True)
-        try:
-            rule = await self.db.get_dnd_rule(ctx.author.id)
-            if not rule:
-                await ctx.followup.send("You do not have a DND schedule set.")
-                return
+        rule = await self.db.get_dnd_rule(ctx.author.id)
+        if not rule:
+            await ctx.followup.send("You do not have a DND schedule set.")
+            return
 
-            user_tz = pytz.timezone(rule['timezone'])
-            now_utc = datetime.datetime.now(pytz.utc)
-            start_utc = now_utc.replace(hour=rule['start_hour_utc'], minute=0)
-            end_utc = now_utc.replace(hour=rule['end_hour_utc'], minute=0)
-            start_local = start_utc.astimezone(user_tz)
-            end_local = end_utc.astimezone(user_tz)
-
-            local_days = set()
-            for i in range(7):
-                if i in rule['weekdays_utc']:
-                    local_days.add(DAY_NAMES[i])
-            day_names_str = ", ".join(sorted(list(local_days), key=lambda d: DAY_NAMES.index(d)))
-
-            await ctx.followup.send(f"**Your DND Schedule:**\n"
-                                    f"Alerts blocked from **{start_local.hour:02d}:00** to **{end_local.hour:02d}:00** ({rule['timezone']})\n"
-                                    f"Days (UTC relative): **{day_names_str}**")
-        except Exception as e:
-            logger.error(f"Error in /dnd view: {e}")
-            await ctx.followup.send("Something went wrong.")
+        user_tz = pytz.timezone(rule['timezone'])
+        now_utc = datetime.datetime.now(pytz.utc)
+        start_utc = now_utc.replace(hour=rule['start_hour_utc'], minute=0)
+        end_utc = now_utc.replace(hour=rule['end_hour_utc'], minute=0)
+        start_local = start_utc.astimezone(user_tz)
+        end_local = end_utc.astimezone(user_tz)
+
+        mask = rule['weekdays_utc_mask']
+        day_names_str = ", ".join(DAY_NAMES[i] for i in range(7) if mask & (1 << i))
+
+        await ctx.followup.send(f"**Your DND Schedule:**\n"
+                                f"Alerts blocked from **{start_local.hour:02d}:00** to **{end_local.hour:02d}:00** ({rule['timezone']})\n"
+                                f"Days (UTC relative): **{day_names_str}**")
 
     @dnd.command(name="clear", description="Clear your DND schedule.")
+    @handle_errors()
     async def dnd_clear(self, ctx: discord.ApplicationContext):
-        try:
-            count = await self.db.delete_dnd_rule(ctx.author.id)
-            if count == 0:
-                await ctx.respond("You had no DND schedule to clear.", ephemeral=True)
-            else:
-                await ctx.respond("Your DND schedule has been cleared.", ephemeral=True)
-        except Exception as e:
-            logger.error(f"Error in /dnd clear: {e}")
-            await ctx.respond("Something went wrong.", ephemeral=True)
+        count = await self.db.delete_dnd_rule(ctx.author.id)
+        if count == 0:
+            await ctx.respond("You had no DND schedule to clear.", ephemeral=True)
+        else:
+            await ctx.respond("Your DND schedule has been cleared.", ephemeral=True)
 
     # --- Shared alert sender ---
-    async def _send_alert(self, embed, clean_content, channel_id, user_id):
-        """Send an alert to a channel or DM."""
-        if channel_id:
-            try:
-                channel = self.bot.get_channel(channel_id)
-                if channel:
-                    perms = channel.permissions_for(channel.guild.me)
-                    if perms.send_messages and perms.embed_links:
-                        await channel.send(content=clean_content, embed=embed)
-                    else:
-                        logger.warning(f"Missing permissions for channel {channel_id}")
-                else:
-                    logger.warning(f"Could not find channel {channel_id}")
-            except Exception as e:
-                logger.error(f"Error sending channel alert: {e}")
-        else:
-            try:
-                user = await self.bot.fetch_user(user_id)
-                await user.send(content=clean_content, embed=embed)
-            except discord.Forbidden:
-                logger.warning(f"Cannot DM user {user_id}")
-            except Exception as e:
-                logger.error(f"Error sending DM alert: {e}")
+    @staticmethod
+    def _build_map_alert_embed(title, description, server_data, prev_round):
+        embed = discord.Embed(title=title, description=description, color=discord.Color.gold())
+        embed.add_field(
+            name="Players",
+            value=f"{server_data['current_player_count']}/{server_data['current_max_players']}"
+        )
+
+        # Enriched: previous round info
+        if prev_round:
+            winner = "Axis" if prev_round['winning_team'] == 1 else "Allies" if prev_round['winning_team'] == 2 else "Draw"
+            duration = prev_round['duration_seconds'] or 0
+            mins = duration // 60
+            embed.add_field(
+                name="Previous Round",
+                value=f"{prev_round['map_name']} — Winner: **{winner}** ({mins}m)",
+                inline=False
+            )
+        return embed
+
+    async def _gather_alerts(self, sends):
+        """Dispatch alert coroutines concurrently, logging any that raised."""
+        results = await asyncio.gather(*sends, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"Error dispatching alert: {result}")
+
+    async def _resolve_alert_channels(self, subs) -> Dict[int, Optional[discord.TextChannel]]:
+        """Resolve and permission-check each distinct alert channel once.
+
+        Channels that are missing or lack Send Messages/Embed Links map to ``None``.
+        Alert webhooks for the resolved channels are set up here too, so
+        concurrent sends never race to create one.
+        """
+        channels = {}
+        for channel_id in {s['channel_id'] for s in subs if s['channel_id']}:
+            channel = self.bot.get_channel(channel_id)
+            if not channel:
+                logger.warning(f"Could not find channel {channel_id}")
+            else:
+                perms = channel.permissions_for(channel.guild.me)
+                if not (perms.send_messages and perms.embed_links):
+                    logger.warning(f"Missing permissions for channel {channel_id}")
+                    channel = None
+                elif (channel_id not in self.alert_webhooks and channel_id not in self.webhook_setup_failed
+                      and perms.manage_webhooks):
+                    await self._create_alert_webhook(channel)
+            channels[channel_id] = channel
+        return channels
+
+    async def _create_alert_webhook(self, channel):
+        """Reuse or create a bot-owned webhook in ``channel`` and persist its URL."""
+        try:
+            hooks = await channel.webhooks()
+            webhook = next((h for h in hooks if h.user and h.user.id == self.bot.user.id), None)
+            if webhook is None:
+                webhook = await channel.create_webhook(name=ALERT_WEBHOOK_NAME)
+            self.alert_webhooks[channel.id] = webhook.url
+            await self.db.upsert_alert_webhook(channel.id, webhook.url)
+        except discord.HTTPException as e:
+            self.webhook_setup_failed.add(channel.id)
+            logger.warning(f"Could not set up alert webhook for channel {channel.id}, using channel.send: {e}")
+
+    async def _post_webhook(self, url: str, body: bytes) -> str:
+        """POST a pre-serialized body to a webhook.
+
+        Returns ``WEBHOOK_SENT``, ``WEBHOOK_GONE`` if the webhook was deleted or
+        revoked, ``WEBHOOK_RATE_LIMITED`` if it was still limited after a retry,
+        or ``WEBHOOK_FAILED`` on any other error (5xx, network, timeout).
+        """
+        try:
+            for _ in range(2):
+                async with self.webhook_session.post(url, data=body, headers=WEBHOOK_HEADERS) as resp:
+                    if resp.status == 429:
+                        await asyncio.sleep(self._webhook_retry_after(resp))
+                        continue
+                    if resp.status in (401, 403, 404):
+                        return WEBHOOK_GONE
+                    resp.raise_for_status()
+                    return WEBHOOK_SENT
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            logger.warning(f"Alert webhook post failed, falling back to channel.send: {e}")
+            return WEBHOOK_FAILED
+        logger.warning("Alert webhook still rate limited after retry, falling back to channel.send")
+        return WEBHOOK_RATE_LIMITED
+
+    @staticmethod
+    def _webhook_retry_after(resp) -> float:
+        """Seconds to wait from a 429's Retry-After header, capped; the body isn't always JSON."""
+        try:
+            retry_after = float(resp.headers.get("Retry-After", WEBHOOK_DEFAULT_RETRY_AFTER))
+        except ValueError:
+            retry_after = WEBHOOK_DEFAULT_RETRY_AFTER
+        return min(max(retry_after, 0.0), WEBHOOK_MAX_RETRY_AFTER)
+
+    async def _send_channel_alert(self, channel, message: AlertMessage):
+        """Post via the channel's alert webhook if there is one, else ``channel.send``."""
+        url = self.alert_webhooks.get(channel.id)
+        if url and self.webhook_session:
+            body = message.webhook_body(self.bot.user.display_name, self.bot.user.display_avatar.url)
+            result = await self._post_webhook(url, body)
+            if result == WEBHOOK_SENT:
+                return
+            if result == WEBHOOK_GONE:
+                # Webhook was deleted or revoked; forget it and fall back
+                self.alert_webhooks.pop(channel.id, None)
+                try:
+                    await self.db.delete_alert_webhook(channel.id)
+                except Exception as e:
+                    logger.warning(f"Could not delete stale alert webhook for channel {channel.id}: {e}")
+        await channel.send(content=message.content, embed=message.embed)
+
+    async def _send_alert(self, message: AlertMessage, channel_id, user_id, channels):
+        """Send an alert to a channel or DM, bounded by the alert semaphore.
+
+        ``channels`` is the map returned by ``_resolve_alert_channels``.
+        """
+        async with self.alert_semaphore:
+            if channel_id:
+                channel = channels.get(channel_id)
+                if not channel:
+                    return
+                try:
+                    await self._send_channel_alert(channel, message)
+                except Exception as e:
+                    logger.error(f"Error sending channel alert: {e}")
+            else:
+                try:
+                    user = await resolve_user(self.bot, user_id)
+                    await user.send(content=message.content, embed=message.embed)
+                except discord.Forbidden:
+                    logger.warning(f"Cannot DM user {user_id}")
+                except Exception as e:
+                    logger.error(f"Error sending DM alert: {e}")
 
     # --- BACKGROUND TASK: MAP CHANGES ---
-    @tasks.loop(seconds=45)
+    @tasks.loop(seconds=MAP_CHECK_INTERVAL_SECONDS)
     async def check_map_changes(self):
         if not self.bot.db.pool:
             return
 
-        now_utc = datetime.datetime.now(pytz.utc)
-
-        try:
-            online_servers_rows = await self.db.get_all_active_servers(limit=500)
-            online_servers = {s['current_server_name']: s for s in online_servers_rows}
-
-            if not self.last_known_maps:
-                for server_name, server_data in online_servers.items():
-                    self.last_known_maps[server_name] = server_data['current_map']
-                logger.info("Initial map state populated.")
-                # Save to DB
-                await self.db.set_bot_state("last_known_maps", self.last_known_maps)
+        await asyncio.sleep(random.uniform(0, MAP_CHECK_JITTER_SECONDS))
+        await self._coalesced_map_check()
+
+    def _on_map_change_notify(self, connection, pid, channel, payload):
+        """asyncpg listener: run a map check as soon as the stats engine signals a change."""
+        if not self.map_change_notified:
+            self.map_change_notified = True
+            self.check_map_changes.change_interval(minutes=MAP_CHANGE_FALLBACK_MINUTES)
+            logger.info(f"Map change notifications active; polling every {MAP_CHANGE_FALLBACK_MINUTES}m as fallback.")
+        self._spawn(self._coalesced_map_check())
+
+    def _spawn(self, coro):
+        task = self.bot.loop.create_task(coro)
+        self.background_tasks.add(task)
+        task.add_done_callback(self.background_tasks.discard)
+
+    def _on_listen_lost(self):
+        """The LISTEN connection dropped: poll at the full rate again until it's re-established."""
+        logger.warning(f"Lost the map change notification connection; polling every {MAP_CHECK_INTERVAL_SECONDS}s.")
+        self.map_change_notified = False
+        self.check_map_changes.change_interval(seconds=MAP_CHECK_INTERVAL_SECONDS)
+        self._spawn(self._relisten())
+
+    async def _listen_for_map_changes(self) -> bool:
+        return await self.db.listen(MAP_CHANGE_CHANNEL, self._on_map_change_notify, self._on_listen_lost)
+
+    async def _relisten(self):
+        delay = LISTEN_RETRY_MIN_SECONDS
+        while not self.bot.is_closed():
+            await asyncio.sleep(delay)
+            try:
+                await self._listen_for_map_changes()
                 return
+            except Exception as e:
+                logger.warning(f"Could not re-listen for map change notifications: {e}")
+                delay = min(delay * 2, LISTEN_RETRY_MAX_SECONDS)
 
-            for server_name, server_data in online_servers.items():
-                current_map = server_data['current_map']
-                last_map = self.last_known_maps.get(server_name)
-
-                if current_map and last_map != current_map:
-                    logger.info(f"MAP CHANGE DETECTED on {server_name}: {last_map} -> {current_map}")
-
-                    subs_to_alert = await self.db.get_matching_subscriptions(
-                        server_name, current_map.lower(), SERVER_SUB_MAP_NAME
-                    )
-
-                    player_count = server_data['current_player_count']
-
-                    # Enriched alert: get previous round result
-                    prev_round = await self.db.get_last_round_for_server(server_name)
+    async def _coalesced_map_check(self):
+        """Run a map check, or fold this request into the one already running.
 
-                    for sub in subs_to_alert:
-                        if player_count <= sub.get("players_over", 0):
-                            continue
+        A burst of notifications while a check is in progress results in a
+        single follow-up check rather than one queued check per notification.
+        """
+        if self.map_check_lock.locked():
+            self.map_check_pending = True
+            return
 
-                        if is_in_dnd(sub, now_utc):
-                            logger.info(f"Skipping alert for user {sub['user_id']} due to DND.")
-                            continue
+        async with self.map_check_lock:
+            self.map_check_pending = True
+            while self.map_check_pending:
+                self.map_check_pending = False
+                await self._run_map_check()
 
-                        if sub['map_name'] == SERVER_SUB_MAP_NAME:
-                            title = "BF1942 Server Alert!"
-                            description = f"**{server_name}** has just changed maps to **{current_map}**!"
-                            clean_content = f"{server_name} changed map to {current_map}"
-                        else:
-                            title = "BF1942 Map Alert!"
-                            description = f"The map **{current_map}** has just started on **{server_name}**!"
-                            clean_content = f"Map {current_map} started on {server_name}"
+    async def _run_map_check(self):
+        now_utc = datetime.datetime.now(pytz.utc)
 
-                        embed = discord.Embed(
-                            title=title, description=description, color=discord.Color.gold()
-                        )
-                        embed.add_field(name="Players", value=f"{player_count}/{server_data['current_max_players']}")
+        try:
+            # Diffed and recorded in SQL; only servers whose map changed come back.
+            # A newer change for a server replaces one still waiting to be sent.
+            for server_data in await self.db.detect_map_changes():
+                server_name = server_data['current_server_name']
+                logger.info(f"MAP CHANGE DETECTED on {server_name}: {server_data['last_map']} -> {server_data['current_map']}")
+                self.pending_map_changes[server_name] = [server_data, 0]
+
+            changed = []
+            for server_name, pending in list(self.pending_map_changes.items()):
+                server_data, attempts = pending
+                if attempts >= MAP_ALERT_MAX_ATTEMPTS:
+                    logger.error(f"Giving up on map change alerts for {server_name} after {attempts} attempts.")
+                    del self.pending_map_changes[server_name]
+                    continue
+                pending[1] = attempts + 1
+                changed.append((server_name, server_data['current_map'], server_data))
+
+            # One round-trip for every changed server instead of one per server
+            subs_by_server = defaultdict(list)
+            channels = {}
+            if changed:
+                rows = await self.db.get_matching_subscriptions(
+                    [name for name, _, _ in changed],
+                    [cur_map for _, cur_map, _ in changed],
+                    [data['current_player_count'] or 0 for _, _, data in changed],
+                    SERVER_SUB_MAP_NAME
+                )
+                for row in rows:
+                    subs_by_server[row['server_name']].append(row)
+                channels = await self._resolve_alert_channels(rows)
+
+            for server_name, current_map, server_data in changed:
+                subs_to_alert = subs_by_server.get(server_name)
+                if not subs_to_alert:
+                    del self.pending_map_changes[server_name]
+                    continue
 
-                        # Enriched: previous round info
-                        if prev_round:
-                            winner = "Axis" if prev_round['winning_team'] == 1 else "Allies" if prev_round['winning_team'] == 2 else "Draw"
-                            duration = prev_round['duration_seconds'] or 0
-                            mins = duration // 60
-                            embed.add_field(
-                                name="Previous Round",
-                                value=f"{prev_round['map_name']} — Winner: **{winner}** ({mins}m)",
-                                inline=False
-                            )
+                # Enriched alert: get previous round result
+                prev_round = await self.db.get_last_round_for_server(server_name)
+
+                # Build both alert variants once per event and share them across recipients
+                server_alert = AlertMessage(
+                    self._build_map_alert_embed(
+                        "BF1942 Server Alert!",
+                        f"**{server_name}** has just changed maps to **{current_map}**!",
+                        server_data, prev_round
+                    ),
+                    f"{server_name} changed map to {current_map}",
+                )
+                map_alert = AlertMessage(
+                    self._build_map_alert_embed(
+                        "BF1942 Map Alert!",
+                        f"The map **{current_map}** has just started on **{server_name}**!",
+                        server_data, prev_round
+                    ),
+                    f"Map {current_map} started on {server_name}",
+                )
 
-                        await self._send_alert(embed, clean_content, sub.get("channel_id"), sub["user_id"])
+                sends = []
+                # players_over thresholds were already applied in SQL
+                for sub in subs_to_alert:
+                    if is_in_dnd(sub, now_utc):
+                        logger.info(f"Skipping alert for user {sub['user_id']} due to DND.")
+                        continue
 
-            # Update state
-            for server_name, server_data in online_servers.items():
-                self.last_known_maps[server_name] = server_data['current_map']
+                    message = server_alert if sub['map_name'] == SERVER_SUB_MAP_NAME else map_alert
+                    sends.append(self._send_alert(message, sub.get("channel_id"), sub["user_id"], channels))
 
-            # Persist to DB
-            await self.db.set_bot_state("last_known_maps", self.last_known_maps)
+                await self._gather_alerts(sends)
+                del self.pending_map_changes[server_name]
 
         except Exception as e:
             logger.error(f"Error in background task: {e}")
@@ -451,14 +651,19 @@ class SubscriptionCommands(commands.Cog):
     @check_map_changes.before_loop
     async def before_check_map_changes(self):
         await self.bot.wait_until_ready()
-        # Load persisted state
         try:
-            saved = await self.db.get_bot_state("last_known_maps")
-            if saved and isinstance(saved, dict):
-                self.last_known_maps = saved
-                logger.info(f"Loaded last_known_maps from DB ({len(saved)} servers).")
+            await self._listen_for_map_changes()
         except Exception as e:
-            logger.warning(f"Could not load last_known_maps: {e}")
+            logger.warning(f"Could not listen for map change notifications: {e}")
+            self._spawn(self._relisten())
+
+        # Load persisted alert webhooks so restarts don't have to relist them
+        try:
+            self.webhook_session = aiohttp.ClientSession()
+            self.alert_webhooks.update(await self.db.get_alert_webhooks())
+            logger.info(f"Loaded {len(self.alert_webhooks)} alert webhooks from DB.")
+        except Exception as e:
+            logger.warning(f"Could not load alert webhooks: {e}")
 
     # --- BACKGROUND TASK: ROUND RESULTS ---
     @tasks.loop(seconds=60)
@@ -512,12 +717,13 @@ class SubscriptionCommands(commands.Cog):
                         top_lines.append(f"{i}. **{p['player_name']}** — {p['score']} pts ({p['kills']}K/{p['deaths']}D)")
                     embed.add_field(name="Top Players", value="\n".join(top_lines), inline=False)
 
-                clean_content = f"Round ended on {server_name}: {rnd['map_name']} — {winner}"
+                message = AlertMessage(embed, f"Round ended on {server_name}: {rnd['map_name']} — {winner}")
 
-                for sub in subs:
-                    if is_in_dnd(sub, now_utc):
-                        continue
-                    await self._send_alert(embed, clean_content, sub.get("channel_id"), sub["user_id"])
+                channels = await self._resolve_alert_channels(subs)
+                await self._gather_alerts([
+                    self._send_alert(message, sub.get("channel_id"), sub["user_id"], channels)
+                    for sub in subs if not is_in_dnd(sub, now_utc)
+                ])
 
             await self.db.set_bot_state("last_round_result_id", max_seen_id)
 
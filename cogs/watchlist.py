@@ -5,7 +5,9 @@ import logging
 import datetime
 import pytz
 from core.database import Database
+from utils.errors import handle_errors
 from utils.dnd import is_in_dnd
+from utils.users import resolve_user
 
 logger = logging.getLogger("bf1942_bot")
 
@@ -25,50 +27,41 @@ class Watchlist(commands.Cog):
         return self.bot.db
 
     @commands.slash_command(name="watch", description="Get a DM when a specific player joins a server.")
+    @handle_errors()
     async def watch(
         self,
         ctx: discord.ApplicationContext,
         player_name: Option(str, "The exact case-sensitive player name")
     ):
         await ctx.defer(ephemeral=True)
-        try:
-            await self.db.add_watchlist(ctx.author.id, player_name)
-            await ctx.followup.send(f"You are now watching **{player_name}**. I'll DM you when they join a server.")
-        except Exception as e:
-            logger.error(f"Error in /watch: {e}")
-            await ctx.followup.send("Something went wrong.", ephemeral=True)
+        await self.db.add_watchlist(ctx.author.id, player_name)
+        await ctx.followup.send(f"You are now watching **{player_name}**. I'll DM you when they join a server.")
 
     @commands.slash_command(name="unwatch", description="Stop watching a player.")
+    @handle_errors()
     async def unwatch(
         self,
         ctx: discord.ApplicationContext,
         player_name: Option(str, " The player name to remove")
     ):
         await ctx.defer(ephemeral=True)
-        try:
-            count = await self.db.remove_watchlist(ctx.author.id, player_name)
-            if count > 0:
-                await ctx.followup.send(f"Stopped watching **{player_name}**.")
-            else:
-                await ctx.followup.send(f"You weren't watching **{player_name}**.", ephemeral=True)
-        except Exception as e:
-            logger.error(f"Error in /unwatch: {e}")
-            await ctx.followup.send("Something went wrong.", ephemeral=True)
+        count = await self.db.remove_watchlist(ctx.author.id, player_name)
+        if count > 0:
+            await ctx.followup.send(f"Stopped watching **{player_name}**.")
+        else:
+            await ctx.followup.send(f"You weren't watching **{player_name}**.", ephemeral=True)
 
     @commands.slash_command(name="watchlist", description="See who you are watching.")
+    @handle_errors()
     async def watchlist(self, ctx: discord.ApplicationContext):
         await ctx.defer(ephemeral=True)
-        try:
-            rows = await self.db.get_user_watchlist(ctx.author.id)
-            if not rows:
-                await ctx.followup.send("You are not watching any players.")
-                return
+        rows = await self.db.get_user_watchlist(ctx.author.id)
+        if not rows:
+            await ctx.followup.send("You are not watching any players.")
+            return
 
-            names = [f"- {r['player_name']}" for r in rows]
-            await ctx.followup.send(f"**Your Watchlist:**\n" + "\n".join(names))
-        except Exception as e:
-            logger.error(f"Error in /watchlist: {e}")
-            await ctx.followup.send("Something went wrong.", ephemeral=True)
+        names = [f"- {r['player_name']}" for r in rows]
+        await ctx.followup.send(f"**Your Watchlist:**\n" + "\n".join(names))
 
     @tasks.loop(seconds=45)
     async def check_watchlist(self):
@@ -78,7 +71,8 @@ class Watchlist(commands.Cog):
         try:
             # 1. Get all currently online players
             rows = await self.db.get_all_online_players()
-            current_online = {r['player_name']: r['current_server_name'] for r in rows}
+            # Records are (player_name, current_server_name) pairs
+            current_online = dict(rows)
             current_online_names = set(current_online.keys())
 
             # 2. Identify Just Joined (Present now, but NOT in previous cycle)
@@ -97,6 +91,9 @@ class Watchlist(commands.Cog):
 
             now_utc = datetime.datetime.now(pytz.utc)
 
+            # player_name -> (content, embed); shared by everyone watching that player
+            alerts = {}
+
             for sub in subs:
                 user_id = sub['user_id']
                 player_name = sub['player_name']
@@ -112,27 +109,13 @@ class Watchlist(commands.Cog):
                 if is_in_dnd(sub, now_utc):
                     continue
 
-                # --- Enriched alert: get server details ---
-                server_detail = await self.db.get_server_details(server_name)
-
                 # --- Send Alert ---
                 try:
-                    user = await self.bot.fetch_user(user_id)
-                    embed = discord.Embed(
-                        title="Watchlist Alert",
-                        description=f"**{player_name}** just joined **{server_name}**!",
-                        color=discord.Color.magenta()
-                    )
-
-                    if server_detail:
-                        map_name = server_detail['current_map'] or 'N/A'
-                        players = f"{server_detail['current_player_count']}/{server_detail['current_max_players']}"
-                        gametype = server_detail['current_gametype'] or 'N/A'
-                        embed.add_field(name="Map", value=map_name, inline=True)
-                        embed.add_field(name="Players", value=players, inline=True)
-                        embed.add_field(name="Gametype", value=gametype, inline=True)
-
-                    clean_content = f"Watchlist: {player_name} joined {server_name}"
+                    if player_name not in alerts:
+                        alerts[player_name] = await self._build_alert(player_name, server_name)
+                    clean_content, embed = alerts[player_name]
+
+                    user = await resolve_user(self.bot, user_id)
                     await user.send(content=clean_content, embed=embed)
 
                     # Set Cooldown (15 minutes)
@@ -151,6 +134,25 @@ class Watchlist(commands.Cog):
         except Exception as e:
             logger.error(f"Error in watchlist task: {e}")
 
+    async def _build_alert(self, player_name: str, server_name: str):
+        """Build the (content, embed) pair for a player joining a server, enriched with server details."""
+        server_detail = await self.db.get_server_details(server_name)
+        embed = discord.Embed(
+            title="Watchlist Alert",
+            description=f"**{player_name}** just joined **{server_name}**!",
+            color=discord.Color.magenta()
+        )
+
+        if server_detail:
+            map_name = server_detail['current_map'] or 'N/A'
+            players = f"{server_detail['current_player_count']}/{server_detail['current_max_players']}"
+            gametype = server_detail['current_gametype'] or 'N/A'
+            embed.add_field(name="Map", value=map_name, inline=True)
+            embed.add_field(name="Players", value=players, inline=True)
+            embed.add_field(name="Gametype", value=gametype, inline=True)
+
+        return f"Watchlist: {player_name} joined {server_name}", embed
+
     @check_watchlist.before_loop
     async def before_check_watchlist(self):
         await self.bot.wait_until_ready()
@@ -1,3 +1,4 @@
+import asyncio
 import asyncpg
 import json
 import logging
@@ -8,25 +9,279 @@ from typing import List, Optional, Dict, Any, Union
 logger = logging.getLogger("bf1942_bot")
 
 LIKE_META_CHARS = re.compile(r"([%_\\])")
+STATUS_ROW_COUNT = re.compile(r"(\d+)$")
+
+# Pool tuning. asyncpg prepares each statement server-side and caches it per
+# connection keyed on the SQL text, so hot queries skip parse+plan on reuse.
+POOL_MIN_SIZE = 4
+POOL_MAX_SIZE = 20
+POOL_STATEMENT_CACHE_SIZE = 200
+POOL_MAX_INACTIVE_LIFETIME = 300
+# Default for command and alert queries, which are short OLTP lookups: fail
+# fast rather than pile up waiters, and skip JIT compilation, which costs
+# more than it saves at this size.
+POOL_COMMAND_TIMEOUT = 10
+POOL_SERVER_SETTINGS = {"jit": "off", "application_name": "bf1942-bot"}
+# PgBouncer rejects unknown startup parameters such as jit; set it on the
+# role instead (ALTER ROLE ... SET jit = off, see readme).
+PGBOUNCER_SERVER_SETTINGS = {"application_name": "bf1942-bot"}
+# Full-history aggregates (/leaderboard, /stats, /profile, /trends, digest)
+# run via fetch_analytics() with a longer timeout and JIT turned back on.
+ANALYTICS_QUERY_TIMEOUT = 60
+# asyncpg waits 60s by default to establish a connection; a reachable
+# server answers in well under a second, so fail startup and reconnects fast.
+POOL_CONNECT_TIMEOUT = 5
+MAP_NAMES_REFRESH_TIMEOUT = 300
+
+# Arbitrary app-wide key for the migration advisory lock
+MIGRATION_LOCK_ID = 0xBF1942
+
+# Behind a PgBouncer transaction-mode pooler each instance keeps a small pool
+# and named prepared statements are disabled (server connections are shared
+# between clients, so a statement prepared on one may not exist on the next).
+PGBOUNCER_POOL_MIN_SIZE = 2
+PGBOUNCER_POOL_MAX_SIZE = 10
+
+# Hot-path statements prepared explicitly once per connection, so they keep
+# their server-side plan even if the LRU statement cache evicts them.
+PREPARED_QUERIES = {
+    "upsert_subscription": """
+        INSERT INTO subscriptions (user_id, server_name, map_name, players_over, guild_id, channel_id, is_paused)
+        VALUES ($1, $2, $3, $4, $5, $6, false)
+        ON CONFLICT (user_id, server_name, map_name_lc)
+        DO UPDATE SET
+            map_name = EXCLUDED.map_name,
+            players_over = EXCLUDED.players_over,
+            guild_id = EXCLUDED.guild_id,
+            channel_id = EXCLUDED.channel_id,
+            is_paused = false;
+    """,
+    "get_user_subscriptions": "SELECT server_name, map_name, players_over, channel_id, is_paused FROM subscriptions WHERE user_id = $1",
+    "delete_all_subscriptions": "DELETE FROM subscriptions WHERE user_id = $1",
+    "set_subscription_paused": "UPDATE subscriptions SET is_paused = $1 WHERE user_id = $2 AND is_paused <> $1",
+    "get_blocklist": "SELECT entity_type, entity_id FROM bot_blocklist",
+    "get_server_suggestions": """
+        SELECT s.current_server_name
+        FROM servers s
+        WHERE lower(s.current_server_name) LIKE $1 ESCAPE '\\'
+          AND s.current_state IN ('ACTIVE', 'EMPTY')
+        ORDER BY s.current_player_count DESC
+        LIMIT 25;
+    """,
+    "get_map_suggestions": "SELECT map_name FROM mv_distinct_map_names WHERE map_name_lc LIKE $1 ESCAPE '\\' LIMIT 25",
+    "get_player_suggestions": """
+        SELECT DISTINCT p.canonical_name AS player_name
+        FROM round_player_stats rps
+        JOIN players p ON rps.player_id = p.player_id
+        WHERE lower(p.canonical_name) LIKE $1 ESCAPE '\\'
+        ORDER BY p.canonical_name
+        LIMIT 25;
+    """,
+    "get_all_active_servers": """
+        SELECT current_server_name, current_map, current_player_count, current_max_players
+        FROM servers
+        WHERE current_state IN ('ACTIVE', 'EMPTY')
+        ORDER BY current_player_count DESC
+        LIMIT $1;
+    """,
+    "get_matching_subscriptions": """
+        SELECT
+            s.user_id, s.server_name, s.channel_id, s.map_name,
+            dnd.start_hour_utc, dnd.end_hour_utc, dnd.weekdays_utc_mask
+        FROM unnest($1::text[], $2::text[], $3::int[]) AS c(server_name, map_name, player_count)
+        JOIN subscriptions s ON s.server_name = c.server_name
+        LEFT JOIN user_dnd_rules dnd ON s.user_id = dnd.user_id
+        WHERE
+            s.is_paused = false
+            AND (s.map_name_lc = lower(c.map_name) OR s.map_name_lc = $4)
+            AND COALESCE(s.players_over, 0) < c.player_count;
+    """,
+    "find_player": """
+        SELECT s.current_server_name, lps.score, lps.kills, lps.deaths
+        FROM live_player_snapshot lps
+        JOIN servers s ON lps.server_ip = s.ip AND lps.server_port = s.port
+        WHERE lps.player_name = $1 AND s.current_state = 'ACTIVE'
+        LIMIT 1;
+    """,
+    "get_servers_by_map": """
+        SELECT current_server_name, current_player_count, current_max_players
+        FROM servers
+        WHERE current_state IN ('ACTIVE', 'EMPTY') AND lower(current_map) = lower($1)
+        ORDER BY current_player_count DESC
+        LIMIT 25;
+    """,
+    "get_servers_by_gametype": """
+        SELECT current_server_name, current_map, current_player_count, current_max_players
+        FROM servers
+        WHERE current_state IN ('ACTIVE', 'EMPTY') AND lower(current_gametype) = lower($1)
+        ORDER BY current_player_count DESC
+        LIMIT 25;
+    """,
+    "get_seed_servers": """
+        SELECT current_server_name, current_map, current_player_count, current_max_players
+        FROM servers
+        WHERE current_state = 'ACTIVE' AND current_player_count > 0 AND current_player_count < 6
+        ORDER BY current_player_count ASC
+        LIMIT 25;
+    """,
+    "get_server_info": """
+        WITH srv AS (
+            SELECT
+                s.ip, s.port, s.current_server_name, s.current_map, s.current_player_count, s.current_max_players,
+                s.current_gametype, s.current_game_port,
+                lss.round_time_remain, lss.tickets1, lss.tickets2, lss.unpure_mods
+            FROM servers s
+            LEFT JOIN live_server_snapshot lss ON s.ip = lss.server_ip AND s.port = lss.server_port
+            WHERE s.current_server_name = $1 AND s.current_state IN ('ACTIVE', 'EMPTY')
+            LIMIT 1
+        ), ranked AS (
+            SELECT COALESCE(NULLIF(lps.player_name, ''), 'Unknown') AS player_name,
+                   COALESCE(lps.score, 0) AS score, COALESCE(lps.kills, 0) AS kills,
+                   COALESCE(lps.deaths, 0) AS deaths, COALESCE(lps.ping, 0) AS ping, lps.team,
+                   ROW_NUMBER() OVER (PARTITION BY lps.team ORDER BY COALESCE(lps.score, 0) DESC) AS rn
+            FROM live_player_snapshot lps
+            JOIN srv ON lps.server_ip = srv.ip AND lps.server_port = srv.port
+            WHERE lps.team IN (1, 2)
+        )
+        SELECT srv.*,
+            (SELECT json_agg(json_build_array(score, kills, deaths, ping, player_name) ORDER BY rn)
+             FROM ranked WHERE team = 1 AND rn <= $2) AS team1_players,
+            (SELECT json_agg(json_build_array(score, kills, deaths, ping, player_name) ORDER BY rn)
+             FROM ranked WHERE team = 2 AND rn <= $2) AS team2_players
+        FROM srv;
+    """,
+    "detect_map_changes": """
+        WITH cur AS (
+            SELECT DISTINCT ON (current_server_name)
+                current_server_name, current_map, current_player_count, current_max_players
+            FROM servers
+            WHERE current_state IN ('ACTIVE', 'EMPTY') AND current_map IS NOT NULL
+            ORDER BY current_server_name, current_player_count DESC
+        ), changed AS (
+            INSERT INTO server_last_maps AS slm (server_name, map_name)
+            SELECT current_server_name, current_map FROM cur
+            ON CONFLICT (server_name) DO UPDATE SET map_name = EXCLUDED.map_name
+            WHERE slm.map_name IS DISTINCT FROM EXCLUDED.map_name
+            RETURNING slm.server_name
+        )
+        -- server_last_maps here is read from the pre-upsert snapshot
+        SELECT cur.current_server_name, cur.current_map, cur.current_player_count, cur.current_max_players,
+               prev.map_name AS last_map
+        FROM changed
+        JOIN cur ON cur.current_server_name = changed.server_name
+        LEFT JOIN server_last_maps prev ON prev.server_name = changed.server_name
+        -- Bootstrap: with nothing recorded yet every server is "new", so just record them
+        WHERE prev.server_name IS NOT NULL OR EXISTS (SELECT 1 FROM server_last_maps);
+    """,
+    "get_watchlist_subscribers": """
+        SELECT
+            w.user_id, w.player_name,
+            dnd.start_hour_utc, dnd.end_hour_utc, dnd.weekdays_utc_mask
+        FROM player_watchlist w
+        LEFT JOIN user_dnd_rules dnd ON w.user_id = dnd.user_id
+        WHERE w.player_name = ANY($1::text[]);
+    """,
+    "get_all_online_players": """
+        SELECT lps.player_name, s.current_server_name
+        FROM live_player_snapshot lps
+        JOIN servers s ON lps.server_ip = s.ip AND lps.server_port = s.port
+        WHERE s.current_state = 'ACTIVE';
+    """,
+}
+
+
+class PreparedConnection(asyncpg.Connection):
+    """Pool connection that lazily prepares and keeps the PREPARED_QUERIES statements."""
+
+    async def prepared(self, name: str):
+        statements = self.__dict__.setdefault("_prepared_statements", {})
+        stmt = statements.get(name)
+        if stmt is None:
+            stmt = statements[name] = await self.prepare(PREPARED_QUERIES[name])
+        return stmt
 
 
 class Database:
-    def __init__(self, dsn: str):
+    def __init__(self, dsn: str, pgbouncer: bool = False, listen_dsn: Optional[str] = None):
         self.dsn = dsn
+        self.pgbouncer = pgbouncer
+        # LISTEN and the migration lock need a session-level connection, so
+        # behind PgBouncer they require a separate direct DSN (skipped without one)
+        self.listen_dsn = listen_dsn or (None if pgbouncer else dsn)
         self.pool: Optional[asyncpg.Pool] = None
+        self.listen_conn: Optional[asyncpg.Connection] = None
         self.ch_client = None
+        self.migrated = False
+        # Set by run_migrations(); map name lookups read rounds directly without it
+        self.has_map_names_view = False
 
     async def connect(self):
         """Creates the database connection pool."""
+        if self.pgbouncer:
+            pool_options = dict(
+                min_size=PGBOUNCER_POOL_MIN_SIZE, max_size=PGBOUNCER_POOL_MAX_SIZE, statement_cache_size=0,
+                server_settings=PGBOUNCER_SERVER_SETTINGS,
+            )
+        else:
+            pool_options = dict(
+                min_size=POOL_MIN_SIZE, max_size=POOL_MAX_SIZE, statement_cache_size=POOL_STATEMENT_CACHE_SIZE,
+                server_settings=POOL_SERVER_SETTINGS,
+            )
         try:
-            self.pool = await asyncpg.create_pool(self.dsn)
-            logger.info("Database connection pool created.")
+            self.pool = await asyncpg.create_pool(
+                self.dsn,
+                max_inactive_connection_lifetime=POOL_MAX_INACTIVE_LIFETIME,
+                command_timeout=POOL_COMMAND_TIMEOUT,
+                timeout=POOL_CONNECT_TIMEOUT,
+                connection_class=PreparedConnection,
+                **pool_options,
+            )
+            logger.info(f"Database connection pool created{' (PgBouncer mode)' if self.pgbouncer else ''}.")
         except Exception as e:
             logger.error(f"Failed to connect to database: {e}")
             raise e
 
+    async def warm_pool(self):
+        """Prepare the PREPARED_QUERIES statements on every idle pool connection.
+
+        create_pool() already opens ``min_size`` connections; this holds them
+        all at once so each one parses and plans the hot statements up front
+        instead of on the first command that lands on it. Run after migrations.
+        """
+        if not self.pool:
+            raise RuntimeError("Database not connected")
+        if self.pgbouncer:
+            return
+        async def warm(conn):
+            # One operation at a time per connection, so prepare in sequence.
+            # A statement that fails (e.g. a missing stats table) just stays
+            # lazy; it will raise again on first real use.
+            failed = []
+            for name in PREPARED_QUERIES:
+                try:
+                    await conn.prepared(name)
+                except Exception as e:
+                    failed.append(f"{name}: {e}")
+            return failed
+
+        conns = await asyncio.gather(*(self.pool.acquire() for _ in range(self.pool.get_min_size())))
+        try:
+            results = await asyncio.gather(*(warm(conn) for conn in conns))
+        finally:
+            await asyncio.gather(*(self.pool.release(conn) for conn in conns))
+
+        # Every connection fails the same way, so report the first one's errors
+        failed = results[0] if results else []
+        for error in failed:
+            logger.warning(f"Could not prepare statement {error}")
+        logger.info(f"Warmed {len(conns)} pool connections ({len(PREPARED_QUERIES) - len(failed)}/{len(PREPARED_QUERIES)} statements).")
+
     async def close(self):
         """Closes the database connection pool."""
+        if self.listen_conn:
+            # Cleared first so the termination listener treats this as deliberate
+            listen_conn, self.listen_conn = self.listen_conn, None
+            await listen_conn.close()
         if self.pool:
             await self.pool.close()
             logger.info("Database connection pool closed.")
@@ -49,9 +304,131 @@ class Database:
             raise RuntimeError("Database not connected")
         return await self.pool.fetchrow(query, *args)
 
+    async def fetchval(self, query: str, *args) -> Any:
+        """Fetches the first column of the first row."""
+        if not self.pool:
+            raise RuntimeError("Database not connected")
+        return await self.pool.fetchval(query, *args)
+
+    async def _run_analytics(self, method: str, query: str, *args):
+        if not self.pool:
+            raise RuntimeError("Database not connected")
+        async with self.pool.acquire() as conn:
+            async with conn.transaction(readonly=True):
+                # SET LOCAL ends with the transaction, so the pooled session keeps jit=off
+                await conn.execute("SET LOCAL jit = on")
+                return await getattr(conn, method)(query, *args, timeout=ANALYTICS_QUERY_TIMEOUT)
+
+    async def fetch_analytics(self, query: str, *args) -> List[asyncpg.Record]:
+        """Fetches rows for a long-running aggregate (JIT on, ANALYTICS_QUERY_TIMEOUT)."""
+        return await self._run_analytics("fetch", query, *args)
+
+    async def fetchrow_analytics(self, query: str, *args) -> Optional[asyncpg.Record]:
+        """Fetches a single row for a long-running aggregate (JIT on, ANALYTICS_QUERY_TIMEOUT)."""
+        return await self._run_analytics("fetchrow", query, *args)
+
+    async def fetch_prepared(self, name: str, *args) -> List[asyncpg.Record]:
+        """Fetches rows using a statement from PREPARED_QUERIES."""
+        if not self.pool:
+            raise RuntimeError("Database not connected")
+        if self.pgbouncer:
+            return await self.pool.fetch(PREPARED_QUERIES[name], *args)
+        async with self.pool.acquire() as conn:
+            stmt = await conn.prepared(name)
+            return await stmt.fetch(*args)
+
+    async def fetchrow_prepared(self, name: str, *args) -> Optional[asyncpg.Record]:
+        """Fetches a single row using a statement from PREPARED_QUERIES."""
+        if not self.pool:
+            raise RuntimeError("Database not connected")
+        if self.pgbouncer:
+            return await self.pool.fetchrow(PREPARED_QUERIES[name], *args)
+        async with self.pool.acquire() as conn:
+            stmt = await conn.prepared(name)
+            return await stmt.fetchrow(*args)
+
+    async def execute_prepared(self, name: str, *args) -> str:
+        """Executes a statement from PREPARED_QUERIES and returns the status string."""
+        if not self.pool:
+            raise RuntimeError("Database not connected")
+        if self.pgbouncer:
+            return await self.pool.execute(PREPARED_QUERIES[name], *args)
+        async with self.pool.acquire() as conn:
+            stmt = await conn.prepared(name)
+            await stmt.fetch(*args)
+            return stmt.get_statusmsg()
+
+    async def _connect_direct(self, dsn: str) -> asyncpg.Connection:
+        """Open a standalone session outside the pool.
+
+        The statement cache is off in case ``dsn`` still routes through PgBouncer.
+        """
+        return await asyncpg.connect(dsn, timeout=POOL_CONNECT_TIMEOUT, statement_cache_size=0)
+
+    async def listen(self, channel: str, callback, on_lost=None) -> bool:
+        """Register a LISTEN callback on a dedicated connection (pooled ones get recycled).
+
+        ``on_lost()`` is called if that connection drops (not on ``close()``);
+        the listener must then be registered again. Returns ``False`` without
+        listening when no session-level DSN is available.
+        """
+        if not self.listen_dsn:
+            logger.warning(f"PgBouncer mode without POSTGRES_LISTEN_DSN; not listening on '{channel}'.")
+            return False
+        if not self.listen_conn:
+            self.listen_conn = await self._connect_direct(self.listen_dsn)
+        if on_lost:
+            def on_terminated(conn):
+                if conn is self.listen_conn:
+                    self.listen_conn = None
+                    on_lost()
+            self.listen_conn.add_termination_listener(on_terminated)
+        await self.listen_conn.add_listener(channel, callback)
+        logger.info(f"Listening for Postgres notifications on '{channel}'.")
+        return True
+
+    async def unlisten(self, channel: str, callback):
+        if self.listen_conn:
+            await self.listen_conn.remove_listener(channel, callback)
+
     # --- Startup Migrations ---
 
     async def run_migrations(self):
+        """Run the startup migrations once per process, and by one instance at a time.
+
+        A session advisory lock serializes concurrent instances. An instance
+        that finds the lock held waits for it, then skips: the holder has
+        already brought the schema up to date. The lock is taken on a direct
+        connection since it must stay on one server session (not true of
+        pooled connections behind PgBouncer). In PgBouncer mode without
+        POSTGRES_LISTEN_DSN the lock can't be held reliably, so migrations
+        run unlocked; they are idempotent.
+        """
+        if self.migrated:
+            return
+        lock_conn = await self._connect_direct(self.listen_dsn or self.dsn)
+        try:
+            if not self.listen_dsn:
+                logger.warning("PgBouncer mode without POSTGRES_LISTEN_DSN; running migrations without the advisory lock.")
+                await self._apply_migrations(lock_conn)
+            elif await lock_conn.fetchval("SELECT pg_try_advisory_lock($1)", MIGRATION_LOCK_ID):
+                try:
+                    await self._apply_migrations(lock_conn)
+                finally:
+                    await lock_conn.execute("SELECT pg_advisory_unlock($1)", MIGRATION_LOCK_ID)
+            else:
+                logger.info("Another instance is running migrations, waiting for it.")
+                await lock_conn.execute("SELECT pg_advisory_lock($1)", MIGRATION_LOCK_ID)
+                await lock_conn.execute("SELECT pg_advisory_unlock($1)", MIGRATION_LOCK_ID)
+            # Creating the view is allowed to fail (see _apply_migrations)
+            self.has_map_names_view = await lock_conn.fetchval("SELECT to_regclass('mv_distinct_map_names') IS NOT NULL")
+            if not self.has_map_names_view:
+                logger.warning("mv_distinct_map_names is missing; map names will be read from rounds.")
+        finally:
+            await lock_conn.close()
+        self.migrated = True
+
+    async def _apply_migrations(self, conn: asyncpg.Connection):
         """Creates all bot-owned tables if they don't exist."""
         statements = [
             """
@@ -66,6 +443,17 @@ class Database:
                 PRIMARY KEY (user_id, server_name, map_name)
             )
             """,
+            # Case-folded map name for alert matching; map_name keeps the user's casing
+            "ALTER TABLE subscriptions ADD COLUMN IF NOT EXISTS map_name_lc TEXT GENERATED ALWAYS AS (lower(map_name)) STORED",
+            "CREATE UNIQUE INDEX IF NOT EXISTS subscriptions_user_server_map_lc_key ON subscriptions (user_id, server_name, map_name_lc)",
+            # Map-change lookup: active subscriptions only, covering the alert columns
+            "DROP INDEX IF EXISTS subscriptions_server_map_lc_idx",
+            """
+            CREATE INDEX IF NOT EXISTS subscriptions_active_lookup_idx
+            ON subscriptions (server_name, map_name_lc)
+            INCLUDE (user_id, players_over, channel_id, map_name)
+            WHERE is_paused = false
+            """,
             """
             CREATE TABLE IF NOT EXISTS user_dnd_rules (
                 user_id BIGINT PRIMARY KEY,
@@ -75,6 +463,14 @@ class Database:
                 timezone TEXT NOT NULL
             )
             """,
+            # weekdays_utc as a bitmask (bit d = weekday d) for the alert-time DND check
+            """
+            CREATE OR REPLACE FUNCTION bot_weekday_mask(days INT[]) RETURNS SMALLINT
+            LANGUAGE sql IMMUTABLE AS $$
+                SELECT COALESCE(bit_or(1 << d), 0)::smallint FROM unnest(days) AS d
+            $$
+            """,
+            "ALTER TABLE user_dnd_rules ADD COLUMN IF NOT EXISTS weekdays_utc_mask SMALLINT GENERATED ALWAYS AS (bot_weekday_mask(weekdays_utc)) STORED",
             """
             CREATE TABLE IF NOT EXISTS player_watchlist (
                 user_id BIGINT,
@@ -113,9 +509,88 @@ class Database:
                 reason TEXT
             )
             """,
+            """
+            CREATE TABLE IF NOT EXISTS server_last_maps (
+                server_name TEXT PRIMARY KEY,
+                map_name TEXT NOT NULL
+            )
+            """,
+            # One-time carry-over of the map state previously kept in bot_state
+            """
+            INSERT INTO server_last_maps (server_name, map_name)
+            SELECT m.key, m.value
+            FROM bot_state, jsonb_each_text(bot_state.value) AS m
+            WHERE bot_state.key = 'last_known_maps' AND jsonb_typeof(bot_state.value) = 'object' AND m.value IS NOT NULL
+            ON CONFLICT (server_name) DO NOTHING
+            """,
+            "DELETE FROM bot_state WHERE key = 'last_known_maps'",
+            """
+            CREATE TABLE IF NOT EXISTS alert_webhooks (
+                channel_id BIGINT PRIMARY KEY,
+                webhook_url TEXT NOT NULL
+            )
+            """,
         ]
+        # Run on the lock connection, which has no command timeout: index
+        # builds on the stats tables can take a while on first start.
         for sql in statements:
-            await self.execute(sql)
+            await conn.execute(sql)
+
+        # Indexes on the stats engine tables backing the autocomplete LIKE
+        # queries and /find. The bot may not own those tables, so a failure
+        # here only costs performance. The scraper writes to them constantly,
+        # so they're built CONCURRENTLY (each statement runs on its own,
+        # outside a transaction) instead of holding a SHARE lock for the build.
+        index_statements = [
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS servers_name_lc_prefix_idx ON servers (lower(current_server_name) text_pattern_ops) WHERE current_state IN ('ACTIVE', 'EMPTY')",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS servers_gametype_lc_prefix_idx ON servers (lower(current_gametype) text_pattern_ops)",
+            # Online-only lookups: /playing by map, /serverinfo and alerts by exact name.
+            # Offline rows make up most of servers, so these stay small.
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS servers_online_map_lc_idx ON servers (lower(current_map)) WHERE current_state IN ('ACTIVE', 'EMPTY')",
+            "DROP INDEX CONCURRENTLY IF EXISTS servers_map_lc_idx",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS servers_online_name_idx ON servers (current_server_name) WHERE current_state IN ('ACTIVE', 'EMPTY')",
+            # Online servers by population: /servers, /seed and both background loops
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS servers_online_by_players_idx
+            ON servers (current_player_count DESC)
+            INCLUDE (current_server_name, current_map, current_max_players, current_state)
+            WHERE current_state IN ('ACTIVE', 'EMPTY')
+            """,
+            # Map autocomplete reads mv_distinct_map_names now, so this only slowed rounds writes
+            "DROP INDEX CONCURRENTLY IF EXISTS rounds_map_name_lc_prefix_idx",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS players_canonical_name_lc_prefix_idx ON players (lower(canonical_name) text_pattern_ops)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS lps_player_lookup_idx ON live_player_snapshot (player_name) INCLUDE (server_ip, server_port, score, kills, deaths)",
+            # Distinct map names, so map autocomplete doesn't aggregate all of rounds
+            """
+            CREATE MATERIALIZED VIEW IF NOT EXISTS mv_distinct_map_names AS
+            SELECT DISTINCT map_name, lower(map_name) AS map_name_lc
+            FROM rounds
+            WHERE map_name IS NOT NULL
+            """,
+            "CREATE UNIQUE INDEX IF NOT EXISTS mv_distinct_map_names_uniq ON mv_distinct_map_names (map_name)",
+            "CREATE INDEX IF NOT EXISTS mv_distinct_map_names_lc_prefix_idx ON mv_distinct_map_names (map_name_lc text_pattern_ops)",
+            # Wake the map-change check as soon as the stats engine writes a new map
+            """
+            CREATE OR REPLACE FUNCTION bot_notify_map_change() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+            BEGIN
+                PERFORM pg_notify('map_change', NEW.current_server_name);
+                RETURN NULL;
+            END
+            $$
+            """,
+            """
+            CREATE OR REPLACE TRIGGER servers_map_change_notify
+            AFTER UPDATE OF current_map ON servers
+            FOR EACH ROW WHEN (OLD.current_map IS DISTINCT FROM NEW.current_map)
+            EXECUTE FUNCTION bot_notify_map_change()
+            """,
+        ]
+        for sql in index_statements:
+            try:
+                await conn.execute(sql)
+            except Exception as e:
+                logger.warning(f"Skipping index migration: {e}")
         logger.info("Bot migrations complete.")
 
     # --- ClickHouse Integration ---
@@ -155,18 +630,27 @@ class Database:
         return [dict(zip(columns, row)) for row in result.result_rows]
 
     @staticmethod
-    def _safe_ilike_prefix(query: str, max_length: int = 64) -> str:
-        """Return a safe prefix pattern for ILIKE by escaping wildcard meta chars."""
-        trimmed = query.strip()[:max_length]
+    def _status_count(status: str) -> int:
+        """Row count from a command tag such as 'DELETE 3' or 'INSERT 0 1'; 0 if absent."""
+        match = STATUS_ROW_COUNT.search(status or "")
+        return int(match.group(1)) if match else 0
+
+    @staticmethod
+    def _safe_like_prefix(query: str, max_length: int = 64) -> str:
+        """Return a safe lowercase prefix pattern for LIKE by escaping wildcard meta chars.
+
+        Match it against ``lower(column)`` so the text_pattern_ops indexes apply.
+        """
+        trimmed = query.strip()[:max_length].lower()
         escaped = LIKE_META_CHARS.sub(r"\\\1", trimmed)
         return f"{escaped}%"
 
     # --- Bot State ---
 
     async def get_bot_state(self, key: str) -> Any:
-        row = await self.fetchrow("SELECT value FROM bot_state WHERE key = $1", key)
-        if row:
-            return json.loads(row['value'])
+        value = await self.fetchval("SELECT value FROM bot_state WHERE key = $1", key)
+        if value is not None:
+            return json.loads(value)
         return None
 
     async def set_bot_state(self, key: str, value: Any):
@@ -183,7 +667,7 @@ class Database:
 
     async def get_blocklist(self) -> Dict[str, List[int]]:
         """Returns {'users': [...], 'guilds': [...]} from bot_blocklist table."""
-        rows = await self.fetch("SELECT entity_type, entity_id FROM bot_blocklist")
+        rows = await self.fetch_prepared("get_blocklist")
         result: Dict[str, List[int]] = {'users': [], 'guilds': []}
         for row in rows:
             if row['entity_type'] == 'user':
@@ -192,88 +676,95 @@ class Database:
                 result['guilds'].append(row['entity_id'])
         return result
 
-    # --- Autocomplete Queries ---
+    # --- Alert Webhooks ---
 
-    async def get_server_suggestions(self, query: str) -> List[str]:
+    async def get_alert_webhooks(self) -> Dict[int, str]:
+        """Returns {channel_id: webhook_url} for every stored alert webhook."""
+        rows = await self.fetch("SELECT channel_id, webhook_url FROM alert_webhooks")
+        return {row['channel_id']: row['webhook_url'] for row in rows}
+
+    async def upsert_alert_webhook(self, channel_id: int, webhook_url: str):
         sql = """
-        SELECT s.current_server_name
-        FROM servers s
-        WHERE s.current_server_name ILIKE $1 ESCAPE '\\'
-          AND s.current_state IN ('ACTIVE', 'EMPTY')
-        ORDER BY s.current_player_count DESC
-        LIMIT 25;
+        INSERT INTO alert_webhooks (channel_id, webhook_url) VALUES ($1, $2)
+        ON CONFLICT (channel_id) DO UPDATE SET webhook_url = EXCLUDED.webhook_url
         """
-        rows = await self.fetch(sql, self._safe_ilike_prefix(query))
+        await self.execute(sql, channel_id, webhook_url)
+
+    async def delete_alert_webhook(self, channel_id: int):
+        await self.execute("DELETE FROM alert_webhooks WHERE channel_id = $1", channel_id)
+
+    # --- Autocomplete Queries ---
+
+    async def get_server_suggestions(self, query: str) -> List[str]:
+        rows = await self.fetch_prepared("get_server_suggestions", self._safe_like_prefix(query))
         return [row['current_server_name'] for row in rows]
 
     async def get_map_suggestions(self, query: str) -> List[str]:
-        sql = "SELECT DISTINCT map_name FROM rounds WHERE map_name ILIKE $1 ESCAPE '\\' LIMIT 25"
-        rows = await self.fetch(sql, self._safe_ilike_prefix(query))
+        if not self.has_map_names_view:
+            # Unindexed scan of rounds; only used until the view exists, and
+            # the in-memory map index normally answers before this is reached.
+            sql = """
+            SELECT DISTINCT map_name
+            FROM rounds
+            WHERE map_name IS NOT NULL AND lower(map_name) LIKE $1 ESCAPE '\\'
+            ORDER BY map_name
+            LIMIT 25;
+            """
+            rows = await self.fetch_analytics(sql, self._safe_like_prefix(query))
+        else:
+            rows = await self.fetch_prepared("get_map_suggestions", self._safe_like_prefix(query))
         return [row['map_name'] for row in rows]
 
     async def get_gametype_suggestions(self, query: str) -> List[str]:
         sql = """
         SELECT DISTINCT current_gametype AS name
         FROM servers
-        WHERE current_state <> 'OFFLINE' AND current_gametype IS NOT NULL AND current_gametype ILIKE $1 ESCAPE '\\'
+        WHERE current_state <> 'OFFLINE' AND current_gametype IS NOT NULL AND lower(current_gametype) LIKE $1 ESCAPE '\\'
         ORDER BY name
         LIMIT 25;
         """
-        rows = await self.fetch(sql, self._safe_ilike_prefix(query))
+        rows = await self.fetch(sql, self._safe_like_prefix(query))
         return [row['name'] for row in rows if row['name']]
 
     async def get_player_suggestions(self, query: str) -> List[str]:
-        sql = """
-        SELECT DISTINCT p.canonical_name AS player_name
-        FROM round_player_stats rps
-        JOIN players p ON rps.player_id = p.player_id
-        WHERE p.canonical_name ILIKE $1 ESCAPE '\\'
-        ORDER BY p.canonical_name
-        LIMIT 25;
-        """
-        rows = await self.fetch(sql, self._safe_ilike_prefix(query))
+        rows = await self.fetch_prepared("get_player_suggestions", self._safe_like_prefix(query))
         return [row['player_name'] for row in rows]
 
-    # --- Server Info Queries ---
+    async def get_all_map_names(self) -> List[str]:
+        if not self.has_map_names_view:
+            rows = await self.fetch_analytics("SELECT DISTINCT map_name FROM rounds WHERE map_name IS NOT NULL")
+        else:
+            rows = await self.fetch("SELECT map_name FROM mv_distinct_map_names")
+        return [row['map_name'] for row in rows]
 
-    async def get_all_active_servers(self, limit: int = 25) -> List[asyncpg.Record]:
+    async def refresh_map_names(self):
+        """Refresh mv_distinct_map_names without blocking readers."""
+        if not self.has_map_names_view:
+            return
+        await self.pool.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY mv_distinct_map_names", timeout=MAP_NAMES_REFRESH_TIMEOUT)
+
+    async def get_all_gametypes(self) -> List[str]:
         sql = """
-        SELECT current_server_name, current_map, current_player_count, current_max_players
+        SELECT DISTINCT current_gametype AS name
         FROM servers
-        WHERE current_state IN ('ACTIVE', 'EMPTY')
-        ORDER BY current_player_count DESC
-        LIMIT $1;
+        WHERE current_state <> 'OFFLINE' AND current_gametype IS NOT NULL
         """
-        return await self.fetch(sql, limit)
+        rows = await self.fetch(sql)
+        return [row['name'] for row in rows]
+
+    # --- Server Info Queries ---
+
+    async def get_all_active_servers(self, limit: int = 25) -> List[asyncpg.Record]:
+        return await self.fetch_prepared("get_all_active_servers", limit)
 
     async def get_servers_by_map(self, map_name: str) -> List[asyncpg.Record]:
-        sql = """
-        SELECT current_server_name, current_player_count, current_max_players
-        FROM servers
-        WHERE current_state IN ('ACTIVE', 'EMPTY') AND current_map ILIKE $1
-        ORDER BY current_player_count DESC;
-        """
-        return await self.fetch(sql, map_name)
+        return await self.fetch_prepared("get_servers_by_map", map_name)
 
     async def get_servers_by_gametype(self, gametype: str) -> List[asyncpg.Record]:
-        sql = """
-        SELECT current_server_name, current_map, current_player_count, current_max_players
-        FROM servers
-        WHERE current_state IN ('ACTIVE', 'EMPTY') AND current_gametype ILIKE $1
-        ORDER BY current_player_count DESC
-        LIMIT 25;
-        """
-        return await self.fetch(sql, gametype)
+        return await self.fetch_prepared("get_servers_by_gametype", gametype)
 
     async def get_seed_servers(self) -> List[asyncpg.Record]:
-        sql = """
-        SELECT current_server_name, current_map, current_player_count, current_max_players
-        FROM servers
-        WHERE current_state = 'ACTIVE' AND current_player_count > 0 AND current_player_count < 6
-        ORDER BY current_player_count ASC
-        LIMIT 25;
-        """
-        return await self.fetch(sql)
+        return await self.fetch_prepared("get_seed_servers")
 
     async def get_server_details(self, server_name: str) -> Optional[asyncpg.Record]:
         sql = """
@@ -287,51 +778,38 @@ class Database:
         """
         return await self.fetchrow(sql, server_name)
 
-    async def get_server_players(self, ip: str, port: int) -> List[asyncpg.Record]:
-        sql = """
-        SELECT player_name, score, kills, deaths, ping, team
-        FROM live_player_snapshot
-        WHERE server_ip = $1 AND server_port = $2;
+    async def get_server_info(self, server_name: str, per_team: int = 15) -> Optional[Dict[str, Any]]:
+        """Server details plus its top ``per_team`` players by score for each team, in one round trip.
+
+        ``team1_players`` / ``team2_players`` are lists of ``[score, kills, deaths, ping, player_name]``
+        rows in rank order, with NULLs already defaulted.
         """
-        return await self.fetch(sql, ip, port)
+        row = await self.fetchrow_prepared("get_server_info", server_name, per_team)
+        if not row:
+            return None
+        info = dict(row)
+        info['team1_players'] = json.loads(row['team1_players']) if row['team1_players'] else []
+        info['team2_players'] = json.loads(row['team2_players']) if row['team2_players'] else []
+        return info
 
     async def find_player(self, player_name: str) -> Optional[asyncpg.Record]:
-        sql = """
-        SELECT s.current_server_name, lps.score, lps.kills, lps.deaths
-        FROM live_player_snapshot lps
-        JOIN servers s ON lps.server_ip = s.ip AND lps.server_port = s.port
-        WHERE lps.player_name = $1 AND s.current_state = 'ACTIVE';
-        """
-        return await self.fetchrow(sql, player_name)
+        return await self.fetchrow_prepared("find_player", player_name)
 
     # --- Subscription Queries ---
 
     async def upsert_subscription(self, user_id: int, server: str, map_name: str, players_over: int, guild_id: int, channel_id: Optional[int]):
-        sql = """
-        INSERT INTO subscriptions (user_id, server_name, map_name, players_over, guild_id, channel_id, is_paused)
-        VALUES ($1, $2, $3, $4, $5, $6, false)
-        ON CONFLICT (user_id, server_name, map_name)
-        DO UPDATE SET
-            players_over = EXCLUDED.players_over,
-            guild_id = EXCLUDED.guild_id,
-            channel_id = EXCLUDED.channel_id,
-            is_paused = false;
-        """
-        await self.execute(sql, user_id, server, map_name, players_over, guild_id, channel_id)
+        await self.execute_prepared("upsert_subscription", user_id, server, map_name, players_over, guild_id, channel_id)
 
     async def get_user_subscriptions(self, user_id: int) -> List[asyncpg.Record]:
-        sql = "SELECT server_name, map_name, players_over, channel_id, is_paused FROM subscriptions WHERE user_id = $1"
-        return await self.fetch(sql, user_id)
+        return await self.fetch_prepared("get_user_subscriptions", user_id)
 
     async def delete_all_subscriptions(self, user_id: int) -> int:
-        sql = "DELETE FROM subscriptions WHERE user_id = $1"
-        status = await self.execute(sql, user_id)
-        return int(status.split(' ')[1])
+        status = await self.execute_prepared("delete_all_subscriptions", user_id)
+        return self._status_count(status)
 
     async def set_subscription_paused(self, user_id: int, is_paused: bool) -> int:
-        sql = "UPDATE subscriptions SET is_paused = $1 WHERE user_id = $2"
-        status = await self.execute(sql, is_paused, user_id)
-        return int(status.split(' ')[1])
+        status = await self.execute_prepared("set_subscription_paused", is_paused, user_id)
+        return self._status_count(status)
 
     # --- DND Queries ---
 
@@ -348,36 +826,37 @@ class Database:
         await self.execute(sql, user_id, start_hour, end_hour, weekdays, timezone)
 
     async def get_dnd_rule(self, user_id: int) -> Optional[asyncpg.Record]:
-        sql = "SELECT * FROM user_dnd_rules WHERE user_id = $1"
+        sql = "SELECT start_hour_utc, end_hour_utc, weekdays_utc_mask, timezone FROM user_dnd_rules WHERE user_id = $1"
         return await self.fetchrow(sql, user_id)
 
     async def delete_dnd_rule(self, user_id: int) -> int:
         sql = "DELETE FROM user_dnd_rules WHERE user_id = $1"
         status = await self.execute(sql, user_id)
-        return int(status.split(' ')[1])
+        return self._status_count(status)
 
     # --- Stats Queries ---
 
-    async def get_top_map_subs(self, limit: int = 10, exclude_map: str = "*all*") -> List[asyncpg.Record]:
+    async def get_top_subscription_stats(self, limit: int = 10, exclude_map: str = "*all*") -> Dict[str, List[asyncpg.Record]]:
+        """Returns {'maps': [...], 'servers': [...]} of (name, count) rows in one round-trip."""
         sql = """
-        SELECT map_name, COUNT(*) as count
-        FROM subscriptions
-        WHERE map_name <> $1
-        GROUP BY map_name
-        ORDER BY count DESC
-        LIMIT $2;
+        (SELECT 'map' AS kind, MIN(map_name) AS name, COUNT(*) AS count
+         FROM subscriptions
+         WHERE map_name_lc <> $1
+         GROUP BY map_name_lc
+         ORDER BY count DESC
+         LIMIT $2)
+        UNION ALL
+        (SELECT 'server' AS kind, server_name AS name, COUNT(*) AS count
+         FROM subscriptions
+         GROUP BY server_name
+         ORDER BY count DESC
+         LIMIT $2);
         """
-        return await self.fetch(sql, exclude_map, limit)
-
-    async def get_top_server_subs(self, limit: int = 10) -> List[asyncpg.Record]:
-        sql = """
-        SELECT server_name, COUNT(*) as count
-        FROM subscriptions
-        GROUP BY server_name
-        ORDER BY count DESC
-        LIMIT $1;
-        """
-        return await self.fetch(sql, limit)
+        rows = await self.fetch(sql, exclude_map, limit)
+        result: Dict[str, List[asyncpg.Record]] = {'maps': [], 'servers': []}
+        for row in rows:
+            result['maps' if row['kind'] == 'map' else 'servers'].append(row)
+        return result
 
     # --- Global Stats Queries ---
 
@@ -387,7 +866,7 @@ class Database:
             (SELECT COUNT(*) FROM rounds) AS total_rounds,
             (SELECT COUNT(DISTINCT player_id) FROM round_player_stats) AS unique_players
         """
-        return await self.fetchrow(sql)
+        return await self.fetchrow_analytics(sql)
 
     async def get_active_player_count(self) -> int:
         sql = """
@@ -396,8 +875,7 @@ class Database:
         JOIN servers s ON lps.server_ip = s.ip AND lps.server_port = s.port
         WHERE s.current_state = 'ACTIVE'
         """
-        row = await self.fetchrow(sql)
-        return row[0] if row else 0
+        return await self.fetchval(sql) or 0
 
     async def get_popular_maps_last_7_days(self, limit: int = 10) -> List[asyncpg.Record]:
         sql = """
@@ -408,23 +886,30 @@ class Database:
         ORDER BY play_count DESC
         LIMIT $1
         """
-        return await self.fetch(sql, limit)
+        return await self.fetch_analytics(sql, limit)
 
     # --- Background Task Queries ---
 
-    async def get_matching_subscriptions(self, server_name: str, map_name: str, server_sub_map_name: str) -> List[asyncpg.Record]:
-        sql = """
-        SELECT
-            s.user_id, s.players_over, s.channel_id, s.map_name,
-            dnd.start_hour_utc, dnd.end_hour_utc, dnd.weekdays_utc
-        FROM subscriptions s
-        LEFT JOIN user_dnd_rules dnd ON s.user_id = dnd.user_id
-        WHERE
-            s.server_name = $1
-            AND s.is_paused = false
-            AND (s.map_name = $2 OR s.map_name = $3);
+    async def detect_map_changes(self) -> List[asyncpg.Record]:
+        """Record every online server's current map and return the servers whose map changed.
+
+        Diffing happens in one statement against ``server_last_maps``: only rows
+        that differ are written, and only those come back (with ``last_map``).
+        Servers seen for the first time come back with ``last_map`` NULL,
+        except on the very first run, when the table is empty and every
+        server is only recorded. Because the upsert is atomic, concurrent
+        bot instances never both claim a change.
+        """
+        return await self.fetch_prepared("detect_map_changes")
+
+    async def get_matching_subscriptions(self, server_names: List[str], map_names: List[str], player_counts: List[int], server_sub_map_name: str) -> List[asyncpg.Record]:
+        """Subscriptions to alert for a batch of map changes; ``server_names[i]`` changed to ``map_names[i]``
+        with ``player_counts[i]`` players.
+
+        Map names are compared case-insensitively via ``map_name_lc``; subscriptions whose
+        ``players_over`` threshold isn't met are filtered out in SQL.
         """
-        return await self.fetch(sql, server_name, map_name, server_sub_map_name)
+        return await self.fetch_prepared("get_matching_subscriptions", server_names, map_names, player_counts, server_sub_map_name)
 
     # --- Watchlist Queries ---
 
@@ -439,31 +924,17 @@ class Database:
     async def remove_watchlist(self, user_id: int, player_name: str) -> int:
         sql = "DELETE FROM player_watchlist WHERE user_id = $1 AND player_name = $2"
         status = await self.execute(sql, user_id, player_name)
-        return int(status.split(' ')[1])
+        return self._status_count(status)
 
     async def get_user_watchlist(self, user_id: int) -> List[asyncpg.Record]:
         sql = "SELECT player_name FROM player_watchlist WHERE user_id = $1"
         return await self.fetch(sql, user_id)
 
     async def get_watchlist_subscribers(self, player_names: List[str]) -> List[asyncpg.Record]:
-        sql = """
-        SELECT
-            w.user_id, w.player_name,
-            dnd.start_hour_utc, dnd.end_hour_utc, dnd.weekdays_utc
-        FROM player_watchlist w
-        LEFT JOIN user_dnd_rules dnd ON w.user_id = dnd.user_id
-        WHERE w.player_name = ANY($1::text[]);
-        """
-        return await self.fetch(sql, player_names)
+        return await self.fetch_prepared("get_watchlist_subscribers", player_names)
 
     async def get_all_online_players(self) -> List[asyncpg.Record]:
-        sql = """
-        SELECT lps.player_name, s.current_server_name
-        FROM live_player_snapshot lps
-        JOIN servers s ON lps.server_ip = s.ip AND lps.server_port = s.port
-        WHERE s.current_state = 'ACTIVE';
-        """
-        return await self.fetch(sql)
+        return await self.fetch_prepared("get_all_online_players")
 
     # --- Round Result Queries ---
 
@@ -479,13 +950,12 @@ class Database:
     async def delete_round_result_subscription(self, user_id: int, server_name: str) -> int:
         sql = "DELETE FROM round_result_subscriptions WHERE user_id = $1 AND server_name = $2"
         status = await self.execute(sql, user_id, server_name)
-        return int(status.split(' ')[1])
+        return self._status_count(status)
 
     async def get_new_completed_rounds(self, last_round_id: int) -> List[asyncpg.Record]:
         sql = """
         SELECT r.round_id AS id, sv.current_server_name AS server_name,
-               r.map_name, r.winner_team AS winning_team, r.duration_seconds,
-               r.start_time, r.end_time
+               r.map_name, r.winner_team AS winning_team, r.duration_seconds
         FROM rounds r
         JOIN servers sv ON r.server_id = sv.server_id
         WHERE r.round_id > $1 AND r.end_time IS NOT NULL
@@ -497,7 +967,7 @@ class Database:
         sql = """
         SELECT p.canonical_name AS player_name,
                rps.final_score AS score, rps.final_kills AS kills,
-               rps.final_deaths AS deaths, rps.team
+               rps.final_deaths AS deaths
         FROM round_player_stats rps
         JOIN players p ON rps.player_id = p.player_id
         WHERE rps.round_id = $1
@@ -509,7 +979,7 @@ class Database:
     async def get_round_result_subscribers(self, server_name: str) -> List[asyncpg.Record]:
         sql = """
         SELECT rrs.user_id, rrs.channel_id,
-               dnd.start_hour_utc, dnd.end_hour_utc, dnd.weekdays_utc
+               dnd.start_hour_utc, dnd.end_hour_utc, dnd.weekdays_utc_mask
         FROM round_result_subscriptions rrs
         LEFT JOIN user_dnd_rules dnd ON rrs.user_id = dnd.user_id
         WHERE rrs.server_name = $1
@@ -574,7 +1044,7 @@ class Database:
         LIMIT ${param_idx}
         """
         params.append(limit)
-        return await self.fetch(sql, *params)
+        return await self.fetch_analytics(sql, *params)
 
     # --- Player Profile Queries ---
 
@@ -593,7 +1063,7 @@ class Database:
         WHERE p.canonical_name = $1
         GROUP BY p.canonical_name
         """
-        return await self.fetchrow(sql, player_name)
+        return await self.fetchrow_analytics(sql, player_name)
 
     async def get_player_top_maps(self, player_name: str, limit: int = 5) -> List[asyncpg.Record]:
         sql = """
@@ -606,7 +1076,7 @@ class Database:
         ORDER BY play_count DESC
         LIMIT $2
         """
-        return await self.fetch(sql, player_name, limit)
+        return await self.fetch_analytics(sql, player_name, limit)
 
     async def get_player_top_servers(self, player_name: str, limit: int = 5) -> List[asyncpg.Record]:
         sql = """
@@ -620,7 +1090,7 @@ class Database:
         ORDER BY play_count DESC
         LIMIT $2
         """
-        return await self.fetch(sql, player_name, limit)
+        return await self.fetch_analytics(sql, player_name, limit)
 
     async def get_player_recent_rounds(self, player_name: str, limit: int = 5) -> List[asyncpg.Record]:
         sql = """
@@ -635,7 +1105,7 @@ class Database:
         ORDER BY r.start_time DESC
         LIMIT $2
         """
-        return await self.fetch(sql, player_name, limit)
+        return await self.fetch_analytics(sql, player_name, limit)
 
     async def get_player_personal_bests(self, player_name: str) -> Optional[asyncpg.Record]:
         sql = """
@@ -646,7 +1116,7 @@ class Database:
         JOIN players p ON rps.player_id = p.player_id
         WHERE p.canonical_name = $1
         """
-        return await self.fetchrow(sql, player_name)
+        return await self.fetchrow_analytics(sql, player_name)
 
     # --- ClickHouse convenience methods ---
 
@@ -703,7 +1173,7 @@ class Database:
         ORDER BY total_score DESC
         LIMIT $2
         """
-        return await self.fetch(sql, server_name, limit)
+        return await self.fetch_analytics(sql, server_name, limit)
 
     async def get_server_popular_maps_24h(self, server_name: str, limit: int = 10) -> List[asyncpg.Record]:
         sql = """
@@ -715,7 +1185,7 @@ class Database:
         ORDER BY play_count DESC
         LIMIT $2
         """
-        return await self.fetch(sql, server_name, limit)
+        return await self.fetch_analytics(sql, server_name, limit)
 
     # --- Digest Queries ---
 
@@ -731,12 +1201,12 @@ class Database:
     async def delete_digest_subscription(self, user_id: int) -> int:
         sql = "DELETE FROM digest_subscriptions WHERE user_id = $1"
         status = await self.execute(sql, user_id)
-        return int(status.split(' ')[1])
+        return self._status_count(status)
 
     async def get_all_digest_subscriptions(self) -> List[asyncpg.Record]:
         sql = """
         SELECT ds.user_id, ds.channel_id,
-               dnd.start_hour_utc, dnd.end_hour_utc, dnd.weekdays_utc
+               dnd.start_hour_utc, dnd.end_hour_utc, dnd.weekdays_utc_mask
         FROM digest_subscriptions ds
         LEFT JOIN user_dnd_rules dnd ON ds.user_id = dnd.user_id
         """
@@ -751,7 +1221,7 @@ class Database:
              JOIN rounds r ON rps.round_id = r.round_id
              WHERE r.start_time >= NOW() - INTERVAL '24 hours') AS unique_players_24h
         """
-        return await self.fetchrow(sql)
+        return await self.fetchrow_analytics(sql)
 
     async def get_most_active_servers_24h(self, limit: int = 5) -> List[asyncpg.Record]:
         sql = """
@@ -763,7 +1233,7 @@ class Database:
         ORDER BY round_count DESC
         LIMIT $1
         """
-        return await self.fetch(sql, limit)
+        return await self.fetch_analytics(sql, limit)
 
     async def get_top_players_24h(self, limit: int = 5) -> List[asyncpg.Record]:
         sql = """
@@ -777,8 +1247,7 @@ class Database:
         ORDER BY total_score DESC
         LIMIT $1
         """
-        return await self.fetch(sql, limit)
+        return await self.fetch_analytics(sql, limit)
 
     async def get_max_round_id(self) -> int:
-        row = await self.fetchrow("SELECT COALESCE(MAX(round_id), 0) AS max_id FROM rounds")
-        return row['max_id']
+        return await self.fetchval("SELECT COALESCE(MAX(round_id), 0) FROM rounds")
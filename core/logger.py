@@ -1,11 +1,16 @@
+import atexit
 import logging
+import queue
 import sys
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 import os
 
 def setup_logger(name: str = "bf1942_bot", log_file: str = "bot.log", level: int = logging.INFO) -> logging.Logger:
     """
     Sets up a logger with both console and file handlers.
+
+    Records are handed to a QueueHandler; a QueueListener thread does the
+    actual stdout/file I/O so logging never blocks the event loop.
     """
     logger = logging.getLogger(name)
     logger.setLevel(level)
@@ -16,10 +21,12 @@ def setup_logger(name: str = "bf1942_bot", log_file: str = "bot.log", level: int
         datefmt='%Y-%m-%d %H:%M:%S'
     )
 
+    handlers = []
+
     # Console Handler
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+    handlers.append(console_handler)
 
     # File Handler
     try:
@@ -27,10 +34,16 @@ def setup_logger(name: str = "bf1942_bot", log_file: str = "bot.log", level: int
             log_file, maxBytes=5*1024*1024, backupCount=5, encoding='utf-8' # 5MB
         )
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        handlers.append(file_handler)
     except Exception as e:
         print(f"Failed to setup file logging: {e}")
 
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(QueueHandler(log_queue))
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
     return logger
 
 # Create a default logger instance
@@ -0,0 +1,42 @@
+import json
+from typing import Optional
+
+import discord
+
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json is used without it
+    orjson = None
+
+
+def dumps(obj) -> bytes:
+    """Serialize ``obj`` to JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+class AlertMessage:
+    """An alert embed plus plain-text content, shared by every recipient of one event.
+
+    The webhook JSON body is serialized on first use and reused, so fanning
+    the same alert out to many channels costs one ``to_dict``/``dumps``.
+    """
+
+    __slots__ = ("embed", "content", "_webhook_body")
+
+    def __init__(self, embed: discord.Embed, content: str):
+        self.embed = embed
+        self.content = content
+        self._webhook_body: Optional[bytes] = None
+
+    def webhook_body(self, username: str, avatar_url: str) -> bytes:
+        if self._webhook_body is None:
+            self._webhook_body = dumps({
+                "content": self.content,
+                "embeds": [self.embed.to_dict()],
+                "username": username,
+                "avatar_url": avatar_url,
+                "allowed_mentions": {"parse": []},
+            })
+        return self._webhook_body
@@ -0,0 +1,97 @@
+import bisect
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+# Discord caps autocomplete results at 25; suggestion queries use the same LIMIT.
+AUTOCOMPLETE_LIMIT = 25
+AUTOCOMPLETE_TTL = 15
+AUTOCOMPLETE_MAX_ENTRIES = 512
+
+# (kind, lowercase prefix) -> (monotonic timestamp, suggestions)
+_ac_cache: "OrderedDict[Tuple[str, str], Tuple[float, List[str]]]" = OrderedDict()
+
+# kind -> full in-memory name index, kept fresh by background refresh tasks
+_indexes: Dict[str, "SuggestionIndex"] = {}
+
+
+class SuggestionIndex:
+    """Sorted lowercase keys over a name list for bisect prefix lookups.
+
+    ``names`` is given in preference order (e.g. by player count); matches
+    for a prefix are returned in that order.
+    """
+
+    def __init__(self, names: List[str]):
+        entries = sorted((name.lower(), rank, name) for rank, name in enumerate(names) if name)
+        self.keys = [key for key, _, _ in entries]
+        self.entries = entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def match(self, prefix: str, limit: int = AUTOCOMPLETE_LIMIT) -> List[str]:
+        lo = bisect.bisect_left(self.keys, prefix)
+        hi = bisect.bisect_left(self.keys, prefix + "\uffff", lo)
+        matches = sorted(self.entries[lo:hi], key=lambda e: e[1])
+        return [name for _, _, name in matches[:limit]]
+
+
+def set_index(kind: str, names: List[str]):
+    """Replace the in-memory suggestion index for ``kind``."""
+    _indexes[kind] = SuggestionIndex(names)
+
+
+def _normalize(prefix: str) -> str:
+    return (prefix or "").strip().lower()[:64]
+
+
+def _lookup(kind: str, prefix: str, ttl: float, now: float):
+    """Return a cached list for ``prefix``, or one filtered from a shorter cached prefix.
+
+    A shorter prefix can only answer for a longer one when its result was not
+    truncated by the LIMIT, otherwise matches could be missing.
+    """
+    entry = _ac_cache.get((kind, prefix))
+    if entry and now - entry[0] < ttl:
+        _ac_cache.move_to_end((kind, prefix))
+        return entry[1]
+
+    for i in range(len(prefix) - 1, -1, -1):
+        entry = _ac_cache.get((kind, prefix[:i]))
+        if entry and now - entry[0] < ttl and len(entry[1]) < AUTOCOMPLETE_LIMIT:
+            return [s for s in entry[1] if s.lower().startswith(prefix)]
+    return None
+
+
+async def cached_suggestions(
+    kind: str,
+    prefix: str,
+    loader: Callable[[], Awaitable[List[str]]],
+    ttl: float = AUTOCOMPLETE_TTL,
+) -> List[str]:
+    """Serve autocomplete suggestions without a DB round-trip where possible.
+
+    A populated in-memory index for ``kind`` answers directly. Otherwise
+    (cold start) a short-lived cache is used: ``loader`` is only awaited on a
+    miss and its result is stored under ``(kind, prefix)`` in an LRU bounded
+    to ``AUTOCOMPLETE_MAX_ENTRIES``.
+    """
+    key_prefix = _normalize(prefix)
+
+    index = _indexes.get(kind)
+    if index:
+        return index.match(key_prefix)
+
+    now = time.monotonic()
+
+    cached = _lookup(kind, key_prefix, ttl, now)
+    if cached is not None:
+        return cached
+
+    result = await loader()
+    _ac_cache[(kind, key_prefix)] = (now, result)
+    _ac_cache.move_to_end((kind, key_prefix))
+    while len(_ac_cache) > AUTOCOMPLETE_MAX_ENTRIES:
+        _ac_cache.popitem(last=False)
+    return result
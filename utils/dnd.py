@@ -5,8 +5,8 @@ def is_in_dnd(record, now_utc: datetime.datetime) -> bool:
     """Check if a subscription/watchlist record is currently in DND.
 
     ``record`` must have keys ``start_hour_utc``, ``end_hour_utc``, and
-    ``weekdays_utc``.  Returns ``False`` when no DND rule is set (i.e.
-    ``start_hour_utc`` is ``None``).
+    ``weekdays_utc_mask`` (bit ``d`` set for UTC weekday ``d``).  Returns
+    ``False`` when no DND rule is set (i.e. ``start_hour_utc`` is ``None``).
     """
     if record['start_hour_utc'] is None:
         return False
@@ -14,7 +14,7 @@ def is_in_dnd(record, now_utc: datetime.datetime) -> bool:
     current_hour = now_utc.hour
     current_weekday = now_utc.weekday()
 
-    is_dnd_day = current_weekday in record['weekdays_utc']
+    is_dnd_day = bool((record['weekdays_utc_mask'] >> current_weekday) & 1)
 
     start_h = record['start_hour_utc']
     end_h = record['end_hour_utc']
@@ -0,0 +1,28 @@
+import functools
+import logging
+
+logger = logging.getLogger("bf1942_bot")
+
+
+def handle_errors(message: str = "Something went wrong."):
+    """Decorate a cog slash command so unexpected errors are logged and reported.
+
+    The user gets ``message`` as an ephemeral reply (or followup, if the
+    interaction was already deferred or answered).
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(self, ctx, *args, **kwargs):
+            try:
+                return await fn(self, ctx, *args, **kwargs)
+            except Exception as e:
+                logger.error(f"Error in /{ctx.command}: {e}")
+                try:
+                    if ctx.response.is_done():
+                        await ctx.followup.send(message, ephemeral=True)
+                    else:
+                        await ctx.respond(message, ephemeral=True)
+                except Exception as send_error:
+                    logger.error(f"Could not report error for /{ctx.command}: {send_error}")
+        return wrapper
+    return decorator
@@ -1,17 +1,37 @@
 import os
 import logging
+import time
+from typing import Callable, Dict, Union
 import aiohttp
 
 logger = logging.getLogger("bf1942_bot")
 
 DISCORD_WEBHOOK_URL = os.getenv("DISCORD_WEBHOOK_URL")
 
+# Repeats of the same alert title inside this window are dropped
+HEALTH_ALERT_COOLDOWN = 60
 
-async def send_health_alert(title: str, message: str):
-    """Post an alert to the configured Discord webhook (if set)."""
+# title -> monotonic time of the last alert sent with it
+_last_sent: Dict[str, float] = {}
+
+
+async def send_health_alert(title: str, message: Union[str, Callable[[], str]]):
+    """Post an alert to the configured Discord webhook (if set).
+
+    ``message`` may be a callable; it is only called once the alert is
+    known to be sent, so dropped alerts cost no formatting.
+    """
     if not DISCORD_WEBHOOK_URL:
         return
 
+    now = time.monotonic()
+    if now - _last_sent.get(title, float("-inf")) < HEALTH_ALERT_COOLDOWN:
+        return
+    _last_sent[title] = now
+
+    if callable(message):
+        message = message()
+
     payload = {
         "embeds": [{
             "title": title,
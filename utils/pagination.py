@@ -26,12 +26,8 @@ class SimplePaginationView(discord.ui.View):
             title=f"{self.title} (Page {self.current_page + 1}/{self.max_pages + 1})",
             color=discord.Color.blue()
         )
-        
-        description = ""
-        for item in current_items:
-            description += str(item) + "\n"
-        
-        embed.description = description
+
+        embed.description = "\n".join(map(str, current_items))
         return embed
 
     def update_buttons(self):
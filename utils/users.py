@@ -0,0 +1,30 @@
+from collections import OrderedDict
+
+import discord
+
+USER_CACHE_MAX_ENTRIES = 10_000
+
+# user_id -> User fetched over HTTP, for users not in the gateway cache
+_user_cache: "OrderedDict[int, discord.User]" = OrderedDict()
+
+
+async def resolve_user(bot, user_id: int) -> discord.User:
+    """Return a User for DMing, preferring caches over ``fetch_user``.
+
+    Checks the bot's gateway cache, then a bounded LRU of previously fetched
+    users, and only falls back to an HTTP ``fetch_user`` on a miss.
+    """
+    user = bot.get_user(user_id)
+    if user:
+        return user
+
+    user = _user_cache.get(user_id)
+    if user:
+        _user_cache.move_to_end(user_id)
+        return user
+
+    user = await bot.fetch_user(user_id)
+    _user_cache[user_id] = user
+    if len(_user_cache) > USER_CACHE_MAX_ENTRIES:
+        _user_cache.popitem(last=False)
+    return user